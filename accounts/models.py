@@ -11,6 +11,12 @@ class User(AbstractUser):
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username']
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=['-date_joined'], name='user_joined_idx'),
+            models.Index(fields=['last_login'], name='user_last_login_idx'),
+        ]
+
 class UserProfile(models.Model):
     CUISINE_CHOICES = [
         ('italian', 'Italiaans'),
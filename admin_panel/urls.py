@@ -6,6 +6,8 @@ urlpatterns = [
     path('dashboard/', views.admin_dashboard, name='admin_dashboard'),
     path('users/', views.user_management, name='user_management'),
     path('users/<int:user_id>/', views.user_detail, name='user_detail'),
+    path('users/<int:user_id>/recommendations/', views.user_recommendations, name='user_recommendations'),
     path('recipes/', views.recipe_analytics, name='recipe_analytics'),
     path('bonus/', views.bonus_management, name='bonus_management'),
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
 ]
\ No newline at end of file
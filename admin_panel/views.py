@@ -1,12 +1,16 @@
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import user_passes_test
+from django.http import JsonResponse
 from django.contrib.auth import authenticate, login
 from django.contrib import messages
 from django.db.models import Count, Q
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from datetime import timedelta
 from accounts.models import User, UserProfile
 from recipes.models import Recipe, RecipeRecommendation
+from recipes.pagination import DEFAULT_PAGE_SIZE, keyset_page, page_size_param, rows_etag
+from recipes.search_cache import get_search_cache
 from shopping.models import AHBonusItem, ShoppingList
 from .models import AdminActivity
 
@@ -82,8 +86,11 @@ def user_detail(request, user_id):
     
     user = User.objects.select_related('profile').get(id=user_id)
     
-    # Get user's activity
-    recommendations = RecipeRecommendation.objects.filter(user=user).select_related('recipe').order_by('-recommended_at')
+    # Get user's activity; older recommendations are paged in from user_recommendations
+    recommendations = (
+        RecipeRecommendation.objects.filter(user=user).select_related('recipe')
+        .order_by('-recommended_at', '-id')[:DEFAULT_PAGE_SIZE]
+    )
     shopping_lists = ShoppingList.objects.filter(user=user).order_by('-created_at')
     fridge_items = user.fridge_items.all()
     
@@ -156,6 +163,49 @@ def bonus_management(request):
     
     return render(request, 'admin_panel/bonus_management.html', context)
 
+@user_passes_test(is_admin)
+def cache_stats(request):
+    """Hit/miss counters of this worker's Spoonacular search cache"""
+    return JsonResponse({'spoonacular_search': get_search_cache().stats()})
+
+RECOMMENDATION_FIELDS = [
+    'id', 'recommended_at', 'reason', 'user_rating', 'rated_at', 'user_feedback', 'recipe_id', 'recipe__title',
+]
+
+@user_passes_test(is_admin)
+def user_recommendations(request, user_id):
+    """Keyset-paginated recommendation history of a user, newest first, with a strong ETag"""
+    try:
+        page_size = page_size_param(request.GET.get('page_size'))
+        rows, next_cursor = keyset_page(
+            RecipeRecommendation.objects.filter(user_id=user_id), 'recommended_at', RECOMMENDATION_FIELDS,
+            cursor=request.GET.get('cursor'), page_size=page_size
+        )
+    except ValueError:
+        return JsonResponse({'error': 'Invalid cursor or page_size'}, status=400)
+    
+    etag = rows_etag(rows, next_cursor)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+    
+    results = [
+        {
+            'id': recommendation_id,
+            'recommended_at': recommended_at,
+            'reason': reason,
+            'user_rating': user_rating,
+            'rated_at': rated_at,
+            'user_feedback': user_feedback,
+            'recipe': {'id': recipe_id, 'title': title},
+        }
+        for recommendation_id, recommended_at, reason, user_rating, rated_at, user_feedback, recipe_id, title in rows
+    ]
+    response = JsonResponse({'results': results, 'next_cursor': next_cursor})
+    response['ETag'] = etag
+    return response
+
 def admin_login(request):
     """Custom admin login with two-factor authentication placeholder"""
     
@@ -0,0 +1,88 @@
+import time
+import numpy as np
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+PERCENTILES = (50, 90, 95, 99)
+
+class Scenario:
+    """A timed call plus untimed per-iteration preparation.
+
+    `prepare()` runs before every iteration and returns the arguments for
+    `run(*args)`; only `run` is timed and counted.
+    """
+
+    def __init__(self, name, run, prepare=None):
+        self.name = name
+        self.run = run
+        self.prepare = prepare or (lambda: ())
+
+def run_scenario(scenario, stubs, iterations=50, warmup=5):
+    """Run a scenario and return its latency, SQL and outbound call statistics"""
+    for _ in range(warmup):
+        scenario.run(*scenario.prepare())
+
+    timings = []
+    queries = []
+    calls_before = stubs.counts()
+    for _ in range(iterations):
+        args = scenario.prepare()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            scenario.run(*args)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries.append(len(captured.captured_queries))
+    calls_after = stubs.counts()
+
+    timings = np.array(timings)
+    outbound = {
+        service: calls_after[service] - calls_before[service]
+        for service in calls_after
+        if calls_after[service] != calls_before[service]
+    }
+    result = {
+        'iterations': iterations,
+        'latency_ms': {
+            'mean': round(float(timings.mean()), 3),
+            'min': round(float(timings.min()), 3),
+            'max': round(float(timings.max()), 3),
+        },
+        'sql_queries': {
+            'mean': round(float(np.mean(queries)), 2),
+            'max': int(max(queries)),
+        },
+        'outbound_calls': {
+            'total': sum(outbound.values()),
+            'per_iteration': round(sum(outbound.values()) / iterations, 2),
+            'by_service': outbound,
+        },
+    }
+    for p in PERCENTILES:
+        result['latency_ms'][f'p{p}'] = round(float(np.percentile(timings, p)), 3)
+    return result
+
+def compare(results, baseline, tolerance=0.25):
+    """Regressions of `results` against a baseline results document.
+
+    A scenario regresses when its p50 or p95 latency, mean SQL query count
+    or outbound calls per iteration grew by more than `tolerance`.
+    Returns a list of human-readable findings.
+    """
+    def grew(new, old):
+        return new > old * (1 + tolerance) and new - old > 1e-9
+
+    regressions = []
+    for name, new in results['scenarios'].items():
+        old = baseline.get('scenarios', {}).get(name)
+        if old is None:
+            continue
+        checks = [
+            ('p50 latency', new['latency_ms']['p50'], old['latency_ms']['p50'], 'ms'),
+            ('p95 latency', new['latency_ms']['p95'], old['latency_ms']['p95'], 'ms'),
+            ('SQL queries', new['sql_queries']['mean'], old['sql_queries']['mean'], ''),
+            ('outbound calls', new['outbound_calls']['per_iteration'], old['outbound_calls']['per_iteration'], ''),
+        ]
+        for label, new_value, old_value, unit in checks:
+            if grew(new_value, old_value):
+                regressions.append(f'{name}: {label} {old_value}{unit} -> {new_value}{unit}')
+    return regressions
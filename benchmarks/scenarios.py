@@ -0,0 +1,138 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+from accounts.models import FridgeItem, User, UserProfile
+from recipes.ingredient_index import IngredientIndex
+from recipes.models import Recipe
+from recipes.search_cache import get_search_cache
+from recipes.services import RecipeRecommendationService
+from shopping.ah_bonus_scraper import update_ah_bonus_cache
+from shopping.bonus_cache import BonusCache
+from shopping.models import AHBonusItem
+from shopping.services import ShoppingListService
+from .runner import Scenario
+
+CUISINES = ['italian', 'asian', 'dutch', 'indian', 'mediterranean']
+INGREDIENT_LINES = [
+    '2 uien', '1 red onion', '3 tomaten', '400 g tomatenblokjes', '2 teentjes knoflook', '1 el olijfolie',
+    '300 g kipfilet', '500 g rundergehakt', '200 g spekjes', '250 g zalmfilet', '200 g garnalen',
+    '250 g spaghetti', '300 g basmatirijst', '1 rode paprika', '1 courgette', '250 g champignons',
+    '200 g spinazie', '2 wortels', '1 prei', '500 g aardappelen', '100 ml kookroom', '200 ml kokosmelk',
+    '50 g geraspte kaas', '125 g mozzarella', '4 eieren', '2 el sojasaus', '1 stuk gember',
+    '1 citroen', 'snufje zout', 'peper naar smaak', '1 bouillonblokje', '2 el bloem', '1 tl suiker',
+]
+BONUS_NAMES = [
+    'AH Kipfilet', 'AH Rundergehakt', 'AH Zalmfilet', 'AH Scharrel eieren', 'AH Cherrytomaten',
+    'AH Rode paprika', 'AH Champignons', 'AH Spinazie', 'AH Basmatirijst', 'AH Spaghetti',
+    'AH Geraspte kaas', 'AH Mozzarella', 'AH Kookroom', 'AH Kokosmelk', 'AH Olijfolie',
+    'Lay\'s Chips', 'Coca-Cola', 'AH Halfvolle melk', 'AH Roomboter', 'AH Volkoren brood',
+    'AH Garnalen', 'AH Ontbijtspek', 'AH Courgette', 'AH Prei', 'AH Walnoten',
+]
+FRIDGE = ['Ui', 'Tomaten', 'Kipfilet', 'Knoflook', 'Olijfolie', 'Paprika', 'Kaas', 'Eieren']
+
+def seed(recipes=500, bonus_items=300, rng=None):
+    """Fill the benchmark database with a recipe corpus, bonus items and users"""
+    rng = rng or random.Random(0)
+
+    corpus = []
+    for i in range(recipes):
+        recipe = Recipe(
+            title=f'Benchmark recipe {i}',
+            description='Seeded for benchmarks.',
+            ingredients=rng.sample(INGREDIENT_LINES, rng.randint(5, 10)),
+            instructions='Kook alles gaar.',
+            prep_time=rng.randint(5, 30),
+            cook_time=rng.randint(10, 60),
+            cuisine_type=CUISINES[i % len(CUISINES)],
+        )
+        recipe.parse_ingredients()
+        corpus.append(recipe)
+    Recipe.objects.bulk_create(corpus, batch_size=500)
+    IngredientIndex.index_recipes(Recipe.objects.all())
+
+    today = timezone.now().date()
+    AHBonusItem.objects.bulk_create([
+        AHBonusItem(
+            name=f'{BONUS_NAMES[i % len(BONUS_NAMES)]} {i // len(BONUS_NAMES) or ""}'.strip(),
+            original_price=Decimal('4.99'),
+            bonus_price=Decimal('3.49'),
+            discount_percentage=rng.randint(10, 50),
+            category='Benchmark',
+            valid_from=today,
+            valid_until=today + timedelta(days=7),
+            ah_product_id=f'bench-{i}',
+        )
+        for i in range(bonus_items)
+    ], batch_size=500)
+
+    users = {}
+    for name, cuisines, fridge, diet, allergies in [
+        ('local', ['italian', 'asian'], FRIDGE, [], ['nuts']),
+        ('remote', ['mexican', 'french'], FRIDGE, ['vegetarian'], []),
+        ('ai', ['mexican'], ['zzz1', 'zzz2'], [], []),
+    ]:
+        user = User.objects.create(username=f'bench-{name}', email=f'bench-{name}@example.com')
+        UserProfile.objects.create(
+            user=user, cuisine_preferences=cuisines, diet_preferences=diet,
+            allergies=allergies, dislikes='olijven, koriander'
+        )
+        FridgeItem.objects.bulk_create([FridgeItem(user=user, name=item) for item in fridge])
+        users[name] = user
+    return users
+
+def build_scenarios(recipes=500, bonus_items=300):
+    """Seed the database and return the benchmark scenarios, in run order"""
+    users = seed(recipes, bonus_items)
+    service = RecipeRecommendationService()
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True)[:50])
+    missing_lines = INGREDIENT_LINES[:10]
+    position = {'recipe': 0}
+
+    def fridge(user):
+        return list(user.fridge_items.all())
+
+    def next_recipe(user):
+        position['recipe'] = (position['recipe'] + 1) % len(recipe_ids)
+        return user, Recipe.objects.get(id=recipe_ids[position['recipe']])
+
+    def reset_remote(user):
+        # Forget what the previous iteration stored so every run goes upstream
+        Recipe.objects.filter(spoonacular_id__isnull=False).delete()
+        Recipe.objects.filter(prompt_fingerprint__isnull=False).delete()
+        get_search_cache().clear()
+        return user, fridge(user)
+
+    return [
+        Scenario(
+            'get_recommendations_local',
+            lambda user, items: service.get_recommendations(user, items),
+            lambda: (users['local'], fridge(users['local'])),
+        ),
+        Scenario(
+            'get_recommendations_remote',
+            lambda user, items: service.get_recommendations(user, items),
+            lambda: reset_remote(users['remote']),
+        ),
+        Scenario(
+            'get_recommendations_ai',
+            lambda user, items: service.get_recommendations(user, items),
+            lambda: reset_remote(users['ai']),
+        ),
+        Scenario(
+            'create_recipe_shopping_list',
+            ShoppingListService.create_recipe_shopping_list,
+            lambda: next_recipe(users['local']),
+        ),
+        Scenario(
+            'get_shopping_recommendations',
+            ShoppingListService.get_shopping_recommendations,
+            lambda: (User.objects.select_related('profile').get(id=users['local'].id),),
+        ),
+        Scenario(
+            'find_matching_bonus_items',
+            BonusCache.find_matching_bonus_items,
+            lambda: (missing_lines,),
+        ),
+        Scenario('update_ah_bonus_cache', update_ah_bonus_cache),
+    ]
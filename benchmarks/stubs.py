@@ -0,0 +1,197 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SERVICES = ('spoonacular', 'openai', 'weather', 'ah')
+
+STUB_INGREDIENTS = [
+    '2 uien', '3 tomaten', '200 g kipfilet', '2 teentjes knoflook', '1 el olijfolie',
+    '250 g pasta', '1 rode paprika', '100 ml kookroom', '50 g geraspte kaas', 'snufje zout',
+]
+
+class StubUpstreams:
+    """Local stand-ins for Spoonacular, OpenAI, OpenWeatherMap and the AH bonus page.
+
+    One threaded HTTP server answers all four on 127.0.0.1 with canned
+    payloads after a configurable per-service latency, and counts the
+    requests each service received.
+    """
+
+    def __init__(self, latency=None, default_latency=0.05, results_per_search=5, bonus_items=50):
+        self.latency = {service: default_latency for service in SERVICES}
+        self.latency.update(latency or {})
+        self.results_per_search = results_per_search
+        self.bonus_items = bonus_items
+        self._counts = {service: 0 for service in SERVICES}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        upstreams = self
+
+        class Handler(StubHandler):
+            stubs = upstreams
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name='benchmark-stubs', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def settings_overrides(self):
+        """Settings that point every upstream client at this server"""
+        return {
+            'SPOONACULAR_BASE_URL': f'{self.base_url}/spoonacular',
+            'OPENAI_API_BASE': f'{self.base_url}/openai/v1',
+            'WEATHER_BASE_URL': f'{self.base_url}/weather',
+            'AH_BASE_URL': f'{self.base_url}/ah',
+            'SPOONACULAR_API_KEY': 'benchmark',
+            'OPENAI_API_KEY': 'benchmark',
+            'WEATHER_API_KEY': 'benchmark',
+        }
+
+    def record(self, service):
+        with self._lock:
+            self._counts[service] += 1
+        time.sleep(self.latency.get(service, 0))
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+    # Canned payloads
+
+    def find_by_ingredients(self, params):
+        ingredients = params.get('ingredients', [''])[0]
+        if 'zzz' in ingredients:
+            return []
+        number = int(params.get('number', [self.results_per_search])[0])
+        cuisine = params.get('cuisine', [''])[0]
+        offset = 100000 + 1000 * (sum(map(ord, cuisine)) % 500)
+        return [
+            {'id': offset + i, 'title': f'Stub {cuisine} recipe {i}', 'usedIngredientCount': 3, 'missedIngredientCount': 2}
+            for i in range(min(number, self.results_per_search))
+        ]
+
+    @staticmethod
+    def recipe_information(recipe_id):
+        return {
+            'id': recipe_id,
+            'title': f'Stub recipe {recipe_id}',
+            'summary': 'A recipe served by the benchmark stubs.',
+            'extendedIngredients': [
+                {'original': STUB_INGREDIENTS[(recipe_id + i) % len(STUB_INGREDIENTS)]} for i in range(6)
+            ],
+            'instructions': 'Snijd alles fijn en bak het gaar.',
+            'preparationMinutes': 15,
+            'cookingMinutes': 25,
+            'servings': 4,
+            'image': '',
+            'sourceUrl': '',
+        }
+
+    @staticmethod
+    def chat_completion():
+        recipe = {
+            'title': 'Stub AI recept',
+            'description': 'Gegenereerd door de benchmark stubs.',
+            'ingredients': STUB_INGREDIENTS[:5],
+            'instructions': 'Meng alles en serveer.',
+            'prep_time': 10,
+            'cook_time': 20,
+            'servings': 2,
+            'difficulty': 'easy',
+        }
+        return {
+            'id': 'chatcmpl-benchmark',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': 'gpt-3.5-turbo',
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': json.dumps(recipe)},
+                'finish_reason': 'stop',
+            }],
+            'usage': {'prompt_tokens': 100, 'completion_tokens': 100, 'total_tokens': 200},
+        }
+
+    def bonus_page(self):
+        cards = []
+        for i in range(self.bonus_items):
+            name = STUB_INGREDIENTS[i % len(STUB_INGREDIENTS)].split(' ', 1)[-1]
+            cards.append(
+                f'<div class="product-card" data-product-id="stub-{i}">'
+                f'<h3>AH {name} {i}</h3>'
+                f'<div class="price"><span class="original-price">€{3 + i % 5},49</span>'
+                f'<span class="bonus-price">€{1 + i % 3},99</span></div>'
+                f'</div>'
+            )
+        return f'<html><body>{"".join(cards)}</body></html>'
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    stubs = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type='application/json'):
+        if not isinstance(body, (bytes, str)):
+            body = json.dumps(body)
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = parse_qs(url.query)
+        parts = url.path.strip('/').split('/')
+
+        if parts[0] == 'spoonacular':
+            self.stubs.record('spoonacular')
+            if parts[-1] == 'findByIngredients':
+                return self._send(200, self.stubs.find_by_ingredients(params))
+            if parts[-1] == 'informationBulk':
+                ids = [int(i) for i in params.get('ids', [''])[0].split(',') if i]
+                return self._send(200, [self.stubs.recipe_information(i) for i in ids])
+            if parts[-1] == 'information' and parts[-2].isdigit():
+                return self._send(200, self.stubs.recipe_information(int(parts[-2])))
+        elif parts[0] == 'weather':
+            self.stubs.record('weather')
+            return self._send(200, {'main': {'temp': 14.0}, 'weather': [{'main': 'Clouds'}]})
+        elif parts[0] == 'ah':
+            self.stubs.record('ah')
+            return self._send(200, self.stubs.bonus_page(), 'text/html; charset=utf-8')
+        self._send(404, {'error': 'unknown stub endpoint'})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.rfile.read(length)
+        if self.path.startswith('/openai/') and self.path.endswith('/chat/completions'):
+            self.stubs.record('openai')
+            return self._send(200, self.stubs.chat_completion())
+        self._send(404, {'error': 'unknown stub endpoint'})
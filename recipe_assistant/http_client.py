@@ -0,0 +1,65 @@
+import os
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+_host_slots = {}
+_host_slots_lock = threading.Lock()
+
+def get_session():
+    """Return the pooled session shared by all outbound calls in this worker"""
+    global _session, _session_pid
+    with _session_lock:
+        # Worker processes forked from a parent must not share its sockets
+        if _session is None or _session_pid != os.getpid():
+            retry = Retry(
+                total=settings.HTTP_MAX_RETRIES,
+                backoff_factor=settings.HTTP_RETRY_BACKOFF,
+                status_forcelist=(429, 500, 502, 503, 504),
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                respect_retry_after_header=True,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(
+                max_retries=retry,
+                pool_connections=settings.HTTP_POOL_CONNECTIONS,
+                pool_maxsize=settings.HTTP_POOL_MAXSIZE
+            )
+            session = requests.Session()
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            _session = session
+            _session_pid = os.getpid()
+        return _session
+
+def _get_host_slots(host):
+    """Return the semaphore limiting concurrent requests to a host"""
+    with _host_slots_lock:
+        if host not in _host_slots:
+            _host_slots[host] = threading.BoundedSemaphore(settings.HTTP_MAX_PER_HOST)
+        return _host_slots[host]
+
+def http_get(url, params=None, headers=None, timeout=None):
+    """GET a URL through the shared session with timeouts, retries and a per-host limit.
+
+    Raises requests.RequestException on failure, like requests.get.
+    """
+    if timeout is None:
+        timeout = (settings.HTTP_CONNECT_TIMEOUT, settings.HTTP_READ_TIMEOUT)
+
+    host = urlsplit(url).netloc
+    slots = _get_host_slots(host)
+    if not slots.acquire(timeout=settings.HTTP_CONNECT_TIMEOUT):
+        raise requests.exceptions.ConnectionError(f"Too many concurrent requests to {host}")
+
+    try:
+        return get_session().get(url, params=params, headers=headers, timeout=timeout)
+    finally:
+        slots.release()
@@ -148,6 +148,57 @@ OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 SPOONACULAR_API_KEY = os.getenv('SPOONACULAR_API_KEY')
 WEATHER_API_KEY = os.getenv('WEATHER_API_KEY')
 
+# Upstream base URLs, overridable to point at local stand-ins (see run_benchmarks)
+SPOONACULAR_BASE_URL = os.getenv('SPOONACULAR_BASE_URL', 'https://api.spoonacular.com')
+OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+WEATHER_BASE_URL = os.getenv('WEATHER_BASE_URL', 'http://api.openweathermap.org')
+AH_BASE_URL = os.getenv('AH_BASE_URL', 'https://www.ah.nl')
+
+# Outbound HTTP client (Spoonacular, OpenWeatherMap, AH)
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))  # seconds
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '10'))  # seconds
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+HTTP_RETRY_BACKOFF = float(os.getenv('HTTP_RETRY_BACKOFF', '0.3'))
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+HTTP_MAX_PER_HOST = int(os.getenv('HTTP_MAX_PER_HOST', '10'))
+
+# Spoonacular search cache (per worker process)
+SPOONACULAR_SEARCH_CACHE_SIZE = int(os.getenv('SPOONACULAR_SEARCH_CACHE_SIZE', '1000'))
+SPOONACULAR_SEARCH_CACHE_TTL = int(os.getenv('SPOONACULAR_SEARCH_CACHE_TTL', str(60 * 60)))  # seconds
+SPOONACULAR_SEARCH_CACHE_STALE_TTL = int(os.getenv('SPOONACULAR_SEARCH_CACHE_STALE_TTL', str(60 * 60 * 23)))  # seconds
+
+# AI recipe generation
+AI_RECIPE_TIMEOUT = int(os.getenv('AI_RECIPE_TIMEOUT', '20'))  # seconds
+
+# Near-duplicate recipes (MinHash over title and canonical ingredients) at or above this Jaccard similarity are merged
+RECIPE_DEDUPE_THRESHOLD = float(os.getenv('RECIPE_DEDUPE_THRESHOLD', '0.8'))
+
+# Rendered recipe_detail bodies (shared Django cache), keyed by recipe id and version
+RECIPE_DETAIL_CACHE_TTL = int(os.getenv('RECIPE_DETAIL_CACHE_TTL', str(60 * 60 * 24)))  # seconds
+
+# Weather cache (shared Django cache)
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', str(60 * 15)))  # seconds
+WEATHER_REFRESH_INTERVAL = int(os.getenv('WEATHER_REFRESH_INTERVAL', str(60 * 5)))  # seconds
+WEATHER_HOT_WINDOW = int(os.getenv('WEATHER_HOT_WINDOW', str(60 * 60)))  # seconds a city stays warm after a request
+
+# Memory-mapped recipe x ingredient matrix, built by `manage.py build_recipe_matrix`
+RECIPE_MATRIX_DIR = os.getenv('RECIPE_MATRIX_DIR', str(BASE_DIR / 'var' / 'recipe_matrix'))
+
+# Collaborative-filtering factors, trained by `manage.py train_recommender`
+RECOMMENDER_MODEL_DIR = os.getenv('RECOMMENDER_MODEL_DIR', str(BASE_DIR / 'var' / 'recommender'))
+
+# Recommendation pipeline
+RECOMMENDATION_CONCURRENT = os.getenv('RECOMMENDATION_CONCURRENT', 'True').lower() == 'true'
+RECOMMENDATION_MAX_WORKERS = int(os.getenv('RECOMMENDATION_MAX_WORKERS', '8'))
+RECOMMENDATION_DEADLINE = float(os.getenv('RECOMMENDATION_DEADLINE', '10'))  # seconds
+RECOMMENDATION_JOBS_IN_PROCESS = os.getenv('RECOMMENDATION_JOBS_IN_PROCESS', 'True').lower() == 'true'  # else run `manage.py run_recommendation_worker`
+RECOMMENDATION_JOB_WORKERS = int(os.getenv('RECOMMENDATION_JOB_WORKERS', '4'))
+RECOMMENDATION_JOB_STALE_AFTER = int(os.getenv('RECOMMENDATION_JOB_STALE_AFTER', '300'))  # seconds before a queued or running job is given up
+RECOMMENDATION_LOCAL_TARGET = int(os.getenv('RECOMMENDATION_LOCAL_TARGET', '5'))  # good local matches needed to skip Spoonacular
+RECOMMENDATION_MIN_COVERAGE = float(os.getenv('RECOMMENDATION_MIN_COVERAGE', '0.5'))  # share of lines in the fridge for a good local match
+RECOMMENDATION_MAX_MISSING = int(os.getenv('RECOMMENDATION_MAX_MISSING', '3'))  # or at most this many missing lines
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Recipe, RecipeRecommendation, SavedRecipe
+from .models import Recipe, RecipeRecommendation, SavedRecipe, RecommendationJob
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
@@ -18,4 +18,11 @@ class RecipeRecommendationAdmin(admin.ModelAdmin):
 class SavedRecipeAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'user', 'saved_at')
     list_filter = ('saved_at',)
-    search_fields = ('recipe__title', 'user__email')
\ No newline at end of file
+    search_fields = ('recipe__title', 'user__email')
+
+@admin.register(RecommendationJob)
+class RecommendationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'status', 'created_at', 'finished_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('user__email',)
+    readonly_fields = ('created_at', 'started_at', 'finished_at')
\ No newline at end of file
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+class RecipesConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'recipes'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .schema import install_postgres_indexes
+        from .search import install_search_schema
+        post_migrate.connect(install_postgres_indexes, sender=self)
+        post_migrate.connect(install_search_schema, sender=self)
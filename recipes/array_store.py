@@ -0,0 +1,92 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+
+CURRENT_FILE = 'CURRENT'
+
+class ArrayStore:
+    """Versioned directory of .npy arrays shared by all workers through mmap.
+
+    Writers publish a complete new version and then atomically swap the
+    CURRENT pointer; readers memory-map whatever CURRENT points at and
+    reload when it changes.
+    """
+
+    def __init__(self, base):
+        self.base = str(base)
+        self._loaded = None
+        self._loaded_version = None
+        self._lock = threading.Lock()
+
+    def publish(self, arrays, meta=None):
+        """Write a new version and make it current"""
+        version = str(time.time_ns())
+        target = os.path.join(self.base, version)
+        os.makedirs(target, exist_ok=True)
+        for name, array in arrays.items():
+            np.save(os.path.join(target, f'{name}.npy'), array)
+        with open(os.path.join(target, 'meta.json'), 'w') as f:
+            json.dump(meta or {}, f)
+
+        tmp_pointer = os.path.join(self.base, f'{CURRENT_FILE}.tmp')
+        with open(tmp_pointer, 'w') as f:
+            f.write(version)
+        os.replace(tmp_pointer, os.path.join(self.base, CURRENT_FILE))
+
+        self._remove_old_versions(keep=version)
+        return version
+
+    def _remove_old_versions(self, keep):
+        for name in os.listdir(self.base):
+            path = os.path.join(self.base, name)
+            if name != keep and name.isdigit() and os.path.isdir(path):
+                for filename in os.listdir(path):
+                    os.remove(os.path.join(path, filename))
+                os.rmdir(path)
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.base, CURRENT_FILE)) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def load(self, factory):
+        """Return factory(arrays, meta) for the current version, cached until it changes.
+
+        Returns None if nothing was published yet.
+        """
+        version = self.current_version()
+        if version is None:
+            return None
+
+        with self._lock:
+            if self._loaded_version != version:
+                target = os.path.join(self.base, version)
+                try:
+                    arrays = {
+                        filename[:-len('.npy')]: np.load(os.path.join(target, filename), mmap_mode='r')
+                        for filename in os.listdir(target)
+                        if filename.endswith('.npy')
+                    }
+                    with open(os.path.join(target, 'meta.json')) as f:
+                        meta = json.load(f)
+                except OSError as e:
+                    print(f"Error loading arrays from {target}: {e}")
+                    return self._loaded
+                self._loaded = factory(arrays, meta)
+                self._loaded_version = version
+            return self._loaded
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_array_store(base):
+    """Return the process-wide ArrayStore for a directory"""
+    base = str(base)
+    with _stores_lock:
+        if base not in _stores:
+            _stores[base] = ArrayStore(base)
+        return _stores[base]
@@ -0,0 +1,150 @@
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .array_store import get_array_store
+from .models import RecipeRecommendation
+
+class FactorModel:
+    """Matrix-factorization model of RecipeRecommendation ratings.
+
+    A rating is predicted as global_mean + user_factors[u] . item_factors[i].
+    Ids are stored sorted so lookups are a binary search on the mmapped
+    arrays, and re-scoring a handful of candidates takes microseconds.
+    """
+
+    def __init__(self, arrays, meta):
+        self.user_ids = arrays['user_ids']
+        self.user_factors = arrays['user_factors']
+        self.item_ids = arrays['item_ids']
+        self.item_factors = arrays['item_factors']
+        self.global_mean = meta['global_mean']
+        self.meta = meta
+
+    @staticmethod
+    def store():
+        return get_array_store(settings.RECOMMENDER_MODEL_DIR)
+
+    @classmethod
+    def load(cls):
+        """Return the current model for this process, or None if none was trained"""
+        return cls.store().load(cls)
+
+    @staticmethod
+    def _positions(ids, wanted):
+        """Row of each wanted id in a sorted id array, -1 when absent"""
+        wanted = np.asarray(wanted, dtype=np.int64)
+        if not len(ids):
+            return np.full(len(wanted), -1)
+        positions = np.searchsorted(ids, wanted)
+        positions[positions >= len(ids)] = 0
+        return np.where(ids[positions] == wanted, positions, -1)
+
+    def predict(self, user_id, recipe_ids):
+        """Predicted ratings of recipes for a user; None if the user is unknown"""
+        user_row = self._positions(self.user_ids, [user_id])[0]
+        if user_row < 0:
+            return None
+        item_rows = self._positions(self.item_ids, recipe_ids)
+        known = item_rows >= 0
+        scores = np.full(len(item_rows), self.global_mean, dtype=np.float32)
+        if known.any():
+            scores[known] += self.item_factors[item_rows[known]] @ self.user_factors[user_row]
+        return scores
+
+def _solve_rows(rows, ratings_by_row, fixed, global_mean, reg):
+    """ALS half-step: least-squares factors for `rows` with the other side fixed"""
+    k = fixed.shape[1]
+    solved = {}
+    for row in rows:
+        columns, values = ratings_by_row[row]
+        other = fixed[columns]
+        a = other.T @ other + reg * len(columns) * np.eye(k)
+        b = other.T @ (values - global_mean)
+        solved[row] = np.linalg.solve(a, b)
+    return solved
+
+def train(factors=16, iterations=10, reg=0.1, full=False, seed=0):
+    """Train the model from the ratings table and publish it.
+
+    Unless `full` is set, the previous model is warm-started and only users
+    and recipes with ratings since the last run are re-solved, so retraining
+    stays cheap as ratings accumulate. Returns a summary dict.
+    """
+    rows = list(
+        RecipeRecommendation.objects.filter(user_rating__isnull=False)
+        .values_list('user_id', 'recipe_id', 'user_rating', 'rated_at')
+    )
+    started_at = timezone.now()
+    if not rows:
+        return {'ratings': 0, 'users': 0, 'items': 0, 'updated_users': 0, 'updated_items': 0}
+
+    user_ids = np.unique(np.array([row[0] for row in rows], dtype=np.int64))
+    item_ids = np.unique(np.array([row[1] for row in rows], dtype=np.int64))
+    user_index = {user_id: i for i, user_id in enumerate(user_ids.tolist())}
+    item_index = {item_id: i for i, item_id in enumerate(item_ids.tolist())}
+    ratings = np.array([row[2] for row in rows], dtype=np.float32)
+    global_mean = float(ratings.mean())
+
+    rng = np.random.default_rng(seed)
+    user_factors = rng.normal(0, 0.1, (len(user_ids), factors)).astype(np.float32)
+    item_factors = rng.normal(0, 0.1, (len(item_ids), factors)).astype(np.float32)
+
+    previous = None if full else FactorModel.load()
+    if previous is not None and previous.user_factors.shape[1] != factors:
+        previous = None
+
+    if previous is None:
+        changed_users = set(range(len(user_ids)))
+        changed_items = set(range(len(item_ids)))
+    else:
+        # Warm start from the previous factors
+        old_users = FactorModel._positions(previous.user_ids, user_ids)
+        known = old_users >= 0
+        user_factors[known] = previous.user_factors[old_users[known]]
+        old_items = FactorModel._positions(previous.item_ids, item_ids)
+        known = old_items >= 0
+        item_factors[known] = previous.item_factors[old_items[known]]
+
+        trained_at = parse_datetime(previous.meta.get('trained_at', ''))
+        changed_users, changed_items = set(), set()
+        for user_id, recipe_id, rating, rated_at in rows:
+            if trained_at is None or rated_at is None or rated_at >= trained_at:
+                changed_users.add(user_index[user_id])
+                changed_items.add(item_index[recipe_id])
+        changed_users.update(np.flatnonzero(old_users < 0).tolist())
+        changed_items.update(np.flatnonzero(old_items < 0).tolist())
+
+    by_user, by_item = {}, {}
+    for (user_id, recipe_id, rating, rated_at), value in zip(rows, ratings):
+        by_user.setdefault(user_index[user_id], ([], []))
+        by_user[user_index[user_id]][0].append(item_index[recipe_id])
+        by_user[user_index[user_id]][1].append(value)
+        by_item.setdefault(item_index[recipe_id], ([], []))
+        by_item[item_index[recipe_id]][0].append(user_index[user_id])
+        by_item[item_index[recipe_id]][1].append(value)
+    by_user = {row: (np.array(cols), np.array(vals)) for row, (cols, vals) in by_user.items()}
+    by_item = {row: (np.array(cols), np.array(vals)) for row, (cols, vals) in by_item.items()}
+
+    for _ in range(iterations if changed_users or changed_items else 0):
+        for row, vector in _solve_rows(changed_users, by_user, item_factors, global_mean, reg).items():
+            user_factors[row] = vector
+        for row, vector in _solve_rows(changed_items, by_item, user_factors, global_mean, reg).items():
+            item_factors[row] = vector
+
+    FactorModel.store().publish(
+        {
+            'user_ids': user_ids,
+            'user_factors': user_factors,
+            'item_ids': item_ids,
+            'item_factors': item_factors,
+        },
+        meta={'global_mean': global_mean, 'factors': factors, 'trained_at': started_at.isoformat()}
+    )
+    return {
+        'ratings': len(rows),
+        'users': len(user_ids),
+        'items': len(item_ids),
+        'updated_users': len(changed_users),
+        'updated_items': len(changed_items),
+    }
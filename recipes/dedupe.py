@@ -0,0 +1,307 @@
+import hashlib
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from shopping.models import RecipeShoppingList
+from .ingredients import canonical_ingredient, ingredient_tokens
+from .models import (
+    Recipe, RecipeAlias, RecipeRecommendation, RecipeSignatureBand, SavedRecipe, UserRecommendationSet
+)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 16 bands of 4 rows: pairs from ~0.5 similarity up share a bucket
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+
+# Fixed seed: signatures must be comparable across processes and releases
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 1 << 29, NUM_PERM, dtype=np.uint64)
+_B = _rng.integers(0, (1 << 61) - 1, NUM_PERM, dtype=np.uint64)
+
+def _hash32(value):
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=4).digest(), 'little')
+
+def recipe_shingles(recipe):
+    """Features compared for near-duplicates: canonical title words and ingredients"""
+    shingles = {f't:{canonical_ingredient(word)}' for word in ingredient_tokens(recipe.title or '')}
+    shingles.update(f'i:{canonical}' for canonical in recipe.canonical_ingredients() if canonical)
+    return shingles
+
+def minhash(shingles):
+    """MinHash signature of a set of strings, NUM_PERM unsigned 64-bit values"""
+    if not shingles:
+        return np.full(NUM_PERM, MERSENNE_PRIME, dtype=np.uint64)
+    values = np.array([_hash32(shingle) for shingle in shingles], dtype=np.uint64)
+    # (a * x + b) mod p for every permutation and shingle; a * x stays below 2**61
+    hashes = (np.outer(_A, values) + _B[:, None]) % MERSENNE_PRIME
+    return hashes.min(axis=1)
+
+def band_buckets(signature):
+    """LSH bucket of every band, as signed 64-bit integers for a BigIntegerField"""
+    buckets = []
+    for band in range(BANDS):
+        digest = hashlib.blake2b(signature[band * ROWS:(band + 1) * ROWS].tobytes(), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, 'little', signed=True))
+    return buckets
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+def same_masks(a, b):
+    """Merging may not change what a recipe is suitable for: diets and allergens must agree"""
+    return a.diet_mask == b.diet_mask and a.allergen_mask == b.allergen_mask
+
+class DuplicateIndex:
+    """Near-duplicate recipe detection and merging.
+
+    Every recipe's MinHash signature is split into LSH bands stored in
+    RecipeSignatureBand, so the candidates for a recipe are the few recipes
+    sharing a bucket instead of the whole table. Candidates are confirmed on
+    the exact Jaccard similarity of their shingles. Recipes whose diet or
+    allergen masks differ are never merged, so a merge cannot hand a user a
+    recipe that was not checked against their profile.
+    """
+
+    @classmethod
+    def index_recipes(cls, recipes):
+        """(Re)write the LSH buckets of several recipes"""
+        recipes = [recipe for recipe in recipes if recipe.pk is not None]
+        bands = [
+            RecipeSignatureBand(recipe=recipe, band=band, bucket=bucket)
+            for recipe in recipes
+            for band, bucket in enumerate(band_buckets(minhash(recipe_shingles(recipe))))
+        ]
+        with transaction.atomic():
+            RecipeSignatureBand.objects.filter(recipe__in=[recipe.pk for recipe in recipes]).delete()
+            RecipeSignatureBand.objects.bulk_create(bands, batch_size=1000)
+
+    @classmethod
+    def find_duplicates(cls, recipes, threshold=None):
+        """The recipe each of a batch of recipes duplicates, without merging anything.
+
+        Works on saved and unsaved recipes. Every entry of the result is an
+        existing recipe, the index of an earlier recipe of the batch it
+        duplicates, or None when it is unique. Costs two queries per batch.
+        """
+        threshold = settings.RECIPE_DEDUPE_THRESHOLD if threshold is None else threshold
+        recipes = list(recipes)
+        if not recipes:
+            return []
+        batch_ids = {recipe.pk for recipe in recipes if recipe.pk is not None}
+        features = [recipe_shingles(recipe) for recipe in recipes]
+        buckets = [list(enumerate(band_buckets(minhash(shingles)))) for shingles in features]
+
+        # Existing recipes sharing any bucket with any recipe of the batch, in one query
+        condition = Q()
+        for recipe_buckets in buckets:
+            for band, bucket in recipe_buckets:
+                condition |= Q(band=band, bucket=bucket)
+        members = {}
+        rows = RecipeSignatureBand.objects.filter(condition).exclude(recipe_id__in=batch_ids)
+        for band, bucket, recipe_id in rows.values_list('band', 'bucket', 'recipe_id'):
+            members.setdefault((band, bucket), set()).add(recipe_id)
+        existing = Recipe.objects.in_bulk({recipe_id for ids in members.values() for recipe_id in ids})
+        existing_shingles = {recipe_id: recipe_shingles(recipe) for recipe_id, recipe in existing.items()}
+
+        # Unique recipes of the batch join the candidates under the key -(index + 1)
+        duplicates = []
+        for index, (recipe, shingles, recipe_buckets) in enumerate(zip(recipes, features, buckets)):
+            candidate_keys = set()
+            for key in recipe_buckets:
+                candidate_keys |= members.get(key, set())
+            best, best_score = None, threshold
+            # Stored recipes first, oldest first, then earlier recipes of the batch
+            for candidate_key in sorted(candidate_keys & existing_shingles.keys(), key=lambda k: (k < 0, abs(k))):
+                if not same_masks(recipe, existing[candidate_key]):
+                    continue
+                score = jaccard(shingles, existing_shingles[candidate_key])
+                if score > best_score or (best is None and score >= best_score):
+                    best, best_score = candidate_key, score
+
+            if best is None:
+                existing[-(index + 1)] = recipe
+                existing_shingles[-(index + 1)] = shingles
+                for key in recipe_buckets:
+                    members.setdefault(key, set()).add(-(index + 1))
+                duplicates.append(None)
+            else:
+                duplicates.append(existing[best] if best > 0 else -best - 1)
+        return duplicates
+
+    @classmethod
+    def resolve(cls, recipe, threshold=None):
+        """Merge a just-ingested recipe into an existing near-duplicate.
+
+        Returns the recipe to use from now on: the existing duplicate, or the
+        recipe itself (now indexed) when it is unique.
+        """
+        return cls.resolve_many([recipe], threshold)[0]
+
+    @classmethod
+    def resolve_many(cls, recipes, threshold=None):
+        """resolve() for a batch of saved recipes, merging every duplicate.
+
+        A recipe may also merge into an earlier recipe of the same batch.
+        Returns the resolved recipes in the given order. New recipes are
+        better checked with find_duplicates() before they are saved, see
+        RecipeRecommendationService.save_recommendations.
+        """
+        recipes = list(recipes)
+        resolved, unique, merges = [], [], {}
+        for recipe, duplicate_of in zip(recipes, cls.find_duplicates(recipes, threshold)):
+            if duplicate_of is None:
+                unique.append(recipe)
+                resolved.append(recipe)
+                continue
+            canonical = resolved[duplicate_of] if isinstance(duplicate_of, int) else duplicate_of
+            merges.setdefault(canonical.pk, (canonical, []))[1].append(recipe)
+            resolved.append(canonical)
+
+        cls.index_recipes(unique)
+        for canonical, duplicates in merges.values():
+            cls.merge(canonical, duplicates)
+        return resolved
+
+    @staticmethod
+    def merge(canonical, duplicates):
+        """Move everything pointing at the `duplicates` to `canonical` and delete them.
+
+        Where the user already has a recommendation or saved entry for the
+        canonical recipe, that row wins; a rating or note only on a
+        duplicate's row is carried over first. The canonical recipe takes over
+        a duplicate's Spoonacular id and AI fingerprint if it has none, and
+        records the others as a RecipeAlias, so no source is imported or
+        generated again. Costs a fixed number of queries however many
+        duplicates are merged.
+        """
+        if isinstance(duplicates, Recipe):
+            duplicates = [duplicates]
+        duplicates = [duplicate for duplicate in duplicates if duplicate.pk != canonical.pk]
+        if not duplicates:
+            return
+        duplicate_ids = [duplicate.pk for duplicate in duplicates]
+
+        with transaction.atomic():
+            affected_users = set()
+            for model, carried in ((RecipeRecommendation, ('user_rating', 'rated_at', 'user_feedback')),
+                                   (SavedRecipe, ('notes',))):
+                rows = list(model.objects.filter(recipe_id__in=duplicate_ids).order_by('recipe_id', 'id'))
+                kept = {
+                    row.user_id: row for row in model.objects.filter(
+                        recipe=canonical, user_id__in={row.user_id for row in rows}
+                    )
+                }
+                moved, dropped, changed = [], [], {}
+                for row in rows:
+                    affected_users.add(row.user_id)
+                    target = kept.get(row.user_id)
+                    if target is None:
+                        kept[row.user_id] = row
+                        moved.append(row.pk)
+                        continue
+                    # The first field decides whether the row carries anything
+                    if not getattr(target, carried[0]) and getattr(row, carried[0]):
+                        for field in carried:
+                            setattr(target, field, getattr(row, field))
+                        changed[target.pk] = target
+                    dropped.append(row.pk)
+                if changed:
+                    model.objects.bulk_update(list(changed.values()), list(carried))
+                model.objects.filter(pk__in=dropped).delete()
+                model.objects.filter(pk__in=moved).update(recipe=canonical)
+
+            RecipeShoppingList.objects.filter(recipe_id__in=duplicate_ids).update(recipe=canonical)
+
+            # Keep every source id resolvable, so no duplicate is fetched or generated again
+            RecipeAlias.objects.filter(recipe_id__in=duplicate_ids).update(recipe=canonical)
+            inherited, aliases = {}, []
+            for duplicate in duplicates:
+                alias = {}
+                for field in ('spoonacular_id', 'prompt_fingerprint'):
+                    value = getattr(duplicate, field)
+                    if value is None:
+                        continue
+                    if getattr(canonical, field) is None and field not in inherited:
+                        inherited[field] = value
+                    else:
+                        alias[field] = value
+                if alias:
+                    aliases.append(RecipeAlias(recipe=canonical, **alias))
+            Recipe.objects.filter(pk__in=duplicate_ids).delete()
+            if aliases:
+                RecipeAlias.objects.bulk_create(aliases)
+            if inherited:
+                Recipe.objects.filter(pk=canonical.pk).update(**inherited)
+                for field, value in inherited.items():
+                    setattr(canonical, field, value)
+            # Materialized recommendation sets may still list the deleted ids
+            if affected_users:
+                UserRecommendationSet.mark_dirty(*affected_users)
+
+    @classmethod
+    def run(cls, threshold=None, batch_size=500, dry_run=False):
+        """Re-index every recipe and merge all near-duplicates into their oldest recipe.
+
+        Recipes are visited oldest first. Each is compared only against the
+        canonical recipes it shares a bucket with, and becomes a canonical
+        recipe itself when none is similar enough. A cluster therefore only
+        holds recipes that passed the threshold against its canonical recipe.
+
+        Returns a list of (canonical_id, [duplicate_ids]).
+        """
+        threshold = settings.RECIPE_DEDUPE_THRESHOLD if threshold is None else threshold
+        batch = []
+        fields = ('id', 'title', 'ingredients', 'parsed_ingredients', 'diet_mask', 'allergen_mask')
+        for recipe in Recipe.objects.only(*fields).iterator(chunk_size=batch_size):
+            batch.append(recipe)
+            if len(batch) >= batch_size:
+                cls.index_recipes(batch)
+                batch = []
+        if batch:
+            cls.index_recipes(batch)
+
+        buckets = {}
+        rows = RecipeSignatureBand.objects.order_by('band', 'bucket').values_list('band', 'bucket', 'recipe_id')
+        for band, bucket, recipe_id in rows.iterator(chunk_size=5000):
+            buckets.setdefault((band, bucket), []).append(recipe_id)
+        # Only recipes sharing a bucket with another one can be duplicates
+        keys_by_recipe = {}
+        for key, members in buckets.items():
+            if len(members) > 1:
+                for recipe_id in members:
+                    keys_by_recipe.setdefault(recipe_id, []).append(key)
+
+        shingles, masks = {}, {}
+        candidate_ids = sorted(keys_by_recipe)
+        for start in range(0, len(candidate_ids), batch_size):
+            recipes = Recipe.objects.only(*fields).in_bulk(candidate_ids[start:start + batch_size])
+            shingles.update((recipe_id, recipe_shingles(recipe)) for recipe_id, recipe in recipes.items())
+            masks.update((recipe_id, (recipe.diet_mask, recipe.allergen_mask)) for recipe_id, recipe in recipes.items())
+
+        canonicals_by_key, clusters = {}, {}
+        for recipe_id in candidate_ids:
+            if recipe_id not in shingles:
+                continue
+            keys = keys_by_recipe[recipe_id]
+            best, best_score = None, threshold
+            for canonical_id in sorted({c for key in keys for c in canonicals_by_key.get(key, ())}):
+                if masks[canonical_id] != masks[recipe_id]:
+                    continue
+                score = jaccard(shingles[recipe_id], shingles[canonical_id])
+                if score > best_score or (best is None and score >= best_score):
+                    best, best_score = canonical_id, score
+            if best is None:
+                for key in keys:
+                    canonicals_by_key.setdefault(key, []).append(recipe_id)
+            else:
+                clusters.setdefault(best, []).append(recipe_id)
+
+        merges = sorted(clusters.items())
+        if not dry_run:
+            for root, duplicate_ids in merges:
+                canonical = Recipe.objects.get(id=root)
+                cls.merge(canonical, list(Recipe.objects.filter(id__in=duplicate_ids)))
+        return merges
@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from .models import Recipe
+
+FRAGMENT_TEMPLATE = 'recipes/_detail_body.html'
+
+def fragment_key(recipe_id, version):
+    return f'recipe_detail_{recipe_id}_{version}'
+
+def get_recipe_fragment(recipe_id):
+    """Rendered, user-independent body of a recipe's detail page.
+
+    Returns a dict with id, title, version and body (HTML), or None if the
+    recipe does not exist. Fragments are keyed by recipe id and version, and
+    the version is read from the database on every request, so a saved
+    recipe is never served stale by any worker, whatever the cache backend.
+    Old versions are never read again and expire after RECIPE_DETAIL_CACHE_TTL.
+    """
+    version = Recipe.objects.filter(id=recipe_id).values_list('version', flat=True).first()
+    if version is None:
+        return None
+
+    fragment = cache.get(fragment_key(recipe_id, version))
+    if fragment is not None:
+        return fragment
+
+    recipe = Recipe.objects.filter(id=recipe_id).first()
+    if recipe is None:
+        return None
+    fragment = {
+        'id': recipe.id,
+        'title': recipe.title,
+        'version': recipe.version,
+        'body': render_to_string(FRAGMENT_TEMPLATE, {'recipe': recipe}),
+    }
+    # Key on the version actually rendered, it may be newer than the one we read
+    cache.set(fragment_key(recipe.id, recipe.version), fragment, settings.RECIPE_DETAIL_CACHE_TTL)
+    return fragment
@@ -0,0 +1,244 @@
+import re
+import unicodedata
+from django.db.models import F
+from accounts.models import UserProfile
+from .ingredients import singular
+
+# Bit i stands for the i-th choice. Only ever append choices: the bits are stored on Recipe.
+DIETS = [key for key, label in UserProfile.DIET_CHOICES]
+ALLERGENS = [key for key, label in UserProfile.ALLERGY_CHOICES]
+DIET_BITS = {diet: 1 << i for i, diet in enumerate(DIETS)}
+ALLERGEN_BITS = {allergen: 1 << i for i, allergen in enumerate(ALLERGENS)}
+
+# Canonical ingredient ids (see ingredients.SYNONYMS) and extra words, for the diets
+PORK = frozenset("""
+    pork bacon ham sausage
+    varkensvlees spek pancetta prosciutto salami chorizo rookworst gehakt
+""".split())
+MEAT = PORK | frozenset("""
+    chicken beef minced_meat
+    meat vlees lamb lam lamsvlees veal kalfsvlees turkey kalkoen duck eend salami
+    chorizo worst bouillon gelatine
+""".split())
+ALCOHOL = frozenset('wine wijn beer bier rum brandy cognac vodka whisky sherry port'.split())
+OTHER_ANIMAL = frozenset('honey honing'.split())
+
+# Allergen detection matches every word of an ingredient line against stems, so
+# compounds and plurals are caught: "hazelnoten", "walnut pieces", "lasagnebladen".
+# `stems` match at the start or end of a word, `words` only as the whole word or,
+# joined by an underscore, as two consecutive words.
+# A match is cancelled when the word itself starts with, or the word before it
+# is, one of the `unless` qualifiers: "amandelmelk" and "peanut butter" are not
+# dairy, "nootmuskaat" is no nut. Missing an allergen is worse than a false
+# alarm, so when in doubt a stem stays in.
+ALLERGEN_RULES = {
+    'nuts': {
+        'stems': """
+            nut noot noten amandel almond cashew pecan pistach macadamia paranoot brazil pinda peanut
+            pijnboompit kastanje praline marsepein marzipan frangipane nougat gianduja nutella pesto
+        """,
+        'words': '',
+        'unless': 'kokos coconut nootmuskaat muskaatnoot nutmeg butternut doughnut nutri',
+    },
+    'gluten': {
+        'stems': """
+            tarwe wheat bloem flour meel pastasaus spaghetti macaroni penne lasagne lasagna tagliatelle
+            fusilli farfalle linguine fettuccine orzo ravioli tortellini gnocchi noodle noedel brood bread
+            crouton tortilla couscous bulgur gerst barley rogge spelt seitan paneermeel breadcrumb panko
+            cracker beschuit bier beer croissant pizza bladerdeeg deeg dough pastry biscuit koek cake
+            volkoren semolina griesmeel sojasaus ketjap wrap
+        """,
+        'words': 'mie rye bun buns roti naan pita pasta soy_sauce',
+        'unless': """
+            glutenvrij gluten-free glutenfree bloemkool rijst rice mais corn maizena amandel almond kokos
+            coconut boekweit buckwheat kikkererwt chickpea tapioca aardappel potato gember ginger zonnebloem
+        """,
+    },
+    'lactose': {
+        'stems': """
+            melk milk boter butter room cream kaas cheese yoghurt yogurt kwark quark ricotta mascarpone
+            mozzarella burrata parmezaan parmesan parmigiano pecorino feta ghee karnemelk buttermilk whey
+            zuivel lactose creme cheddar gruyere emmentaler gorgonzola halloumi brie camembert custard
+        """,
+        'words': 'wei vla ijs',
+        'unless': """
+            lactosevrij lactose-free dairy-free vegan plantaardig kokos coconut amandel almond soja soy
+            haver oat rijst rice cashew pinda peanut cacao cocoa hazelnoot hazelnut noten nut mushroom butternut
+        """,
+    },
+    'fish': {
+        'stems': """
+            fish vis zalm salmon tonijn tuna kabeljauw makreel mackerel haring herring ansjovis anchov
+            sardin sardien forel trout tilapia pangasius schol heilbot halibut snoek zeebaars tarbot
+            kibbeling surimi bonito katsuobushi
+        """,
+        'words': 'cod bass dashi',
+        'unless': 'inktvis vegan',
+    },
+    'shellfish': {
+        'stems': """
+            garnaal garnalen shrimp prawn gamba scampi mossel mussel krab crab kreeft lobster oester oyster
+            clam scallop coquille langoustine inktvis squid calamar octopus schaaldier shellfish
+            zeevruchten seafood
+        """,
+        'words': '',
+        'unless': 'oesterzwam vegan',
+    },
+    'eggs': {
+        'stems': 'eier eidooier eigeel eiwit egg mayonaise mayonnaise mayo aioli meringue',
+        'words': 'ei eitje eitjes yolk yolks',
+        'unless': 'eggplant eivrij egg-free vegan',
+    },
+    'soy': {
+        'stems': 'soja soy tofu tempeh edamame miso ketjap tamari',
+        'words': '',
+        'unless': 'tamarind',
+    },
+}
+# Meat is matched the same way, on the part of the line before the first comma:
+# what follows is preparation, as in "2 uien, gehakt". Pork lines count as meat.
+MEAT_RULES = {
+    'meat': {
+        'stems': """
+            vlees meat kip chicken rund beef varken pork lams lamb kalfs veal kalkoen turkey eend duck
+            konijn rabbit hert venison gehakt spek bacon pancetta prosciutto salami chorizo pepperoni
+            worst sausage hamburger shoarma shawarma kebab gyros biefstuk steak entrecote ossenhaas
+            kotelet karbonade schnitzel sparerib slavink frikandel gelatine
+        """,
+        'words': 'ham lam bouillon ribs mince',
+        'unless': """
+            vegan vegetarisch vegetarian plantaardig vleesvervanger meatless gehakte fijngehakt grof
+            kippenei spekkoek lamsoor kokos coconut groente vegetable bloemkool cauliflower tonijn tuna
+            zalm salmon
+        """,
+    },
+    'pork': {
+        'stems': 'varken pork spek bacon pancetta prosciutto salami chorizo pepperoni rookworst hamlap',
+        'words': 'ham gehakt',
+        'unless': 'vegan vegetarisch vegetarian plantaardig spekkoek',
+    },
+}
+
+def _compile_rules(rules):
+    return {
+        name: (
+            tuple(rule['stems'].split()),
+            frozenset(rule['words'].split()),
+            tuple(rule['unless'].split()),
+        )
+        for name, rule in rules.items()
+    }
+
+ALLERGEN_STEMS = _compile_rules(ALLERGEN_RULES)
+MEAT_STEMS = _compile_rules(MEAT_RULES)
+LINE_WORD_RE = re.compile(r"[^\W\d_]+(?:[-_][^\W\d_]+)*", re.UNICODE)
+
+# Diet labels used by recipe sources in Recipe.diet_type
+DECLARED_DIETS = {
+    'vegan': ['vegan', 'vegetarian', 'pescatarian'],
+    'vegetarian': ['vegetarian', 'pescatarian'],
+    'lacto ovo vegetarian': ['vegetarian', 'pescatarian'],
+    'pescatarian': ['pescatarian'],
+    'pescetarian': ['pescatarian'],
+    'halal': ['halal'],
+    'kosher': ['kosher'],
+}
+
+def _line_words(text):
+    """Lowercase, accent-free words of an ingredient line, in order"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return LINE_WORD_RE.findall(text)
+
+def _matches_stem(word, stems, words, previous=''):
+    base = singular(word)
+    return (
+        word in words or base in words or f'{previous}_{base}' in words
+        or word.startswith(stems) or base.endswith(stems)
+    )
+
+def _line_matches(words, compiled):
+    found = set()
+    for name, (stems, exact, unless) in compiled.items():
+        for i, word in enumerate(words):
+            previous = words[i - 1] if i else ''
+            if not _matches_stem(word, stems, exact, previous):
+                continue
+            if unless and (word.startswith(unless) or previous.startswith(unless)):
+                continue
+            found.add(name)
+            break
+    return found
+
+def line_allergens(words):
+    """Allergens found in the words of one ingredient line"""
+    return _line_matches(words, ALLERGEN_STEMS)
+
+def line_meats(line):
+    """'meat' and 'pork' as found in the ingredient part of one line"""
+    found = _line_matches(_line_words(str(line).split(',')[0]), MEAT_STEMS)
+    if 'pork' in found:
+        found.add('meat')
+    return found
+
+def recipe_masks(parsed_ingredients, diet_type=(), lines=None):
+    """(diet_mask, allergen_mask) of a recipe from its parsed ingredients.
+
+    Diets are inferred conservatively from the ingredients, plus whatever the
+    recipe source declared in diet_type. Allergens and meat are matched on
+    the words of the original `lines` when given, else on the parsed names;
+    a declared diet never clears an allergen.
+    """
+    parsed_ingredients = list(parsed_ingredients)
+    if lines is None:
+        lines = [parsed['name'] for parsed in parsed_ingredients]
+
+    words = set()
+    allergens = set()
+    meats = set()
+    for line, parsed in zip(lines, parsed_ingredients):
+        words.update(parsed['name'].split())
+        words.add(parsed['canonical'])
+        allergens |= line_allergens(_line_words(line))
+        meats |= line_meats(line)
+
+    has_meat = bool(words & MEAT) or 'meat' in meats
+    has_pork = bool(words & PORK) or 'pork' in meats
+    has_fish = bool(allergens & {'fish', 'shellfish'})
+    has_animal = has_meat or has_fish or bool(allergens & {'lactose', 'eggs'}) or bool(words & OTHER_ANIMAL)
+
+    diets = {'meat'}
+    if not has_meat:
+        diets.add('pescatarian')
+        if not has_fish:
+            diets.add('vegetarian')
+            if not has_animal:
+                diets.add('vegan')
+    if not has_pork and not words & ALCOHOL:
+        diets.add('halal')
+    if not has_pork and 'shellfish' not in allergens and not (has_meat and 'lactose' in allergens):
+        diets.add('kosher')
+    for label in diet_type or []:
+        diets.update(DECLARED_DIETS.get(str(label).strip().lower(), []))
+
+    return (
+        sum(DIET_BITS[diet] for diet in diets if diet in DIET_BITS),
+        sum(ALLERGEN_BITS[allergen] for allergen in allergens if allergen in ALLERGEN_BITS),
+    )
+
+def profile_masks(profile):
+    """(required diet bits, forbidden allergen bits) of a user profile"""
+    required = sum(DIET_BITS.get(diet, 0) for diet in set(profile.diet_preferences or []))
+    forbidden = sum(ALLERGEN_BITS.get(allergen, 0) for allergen in set(profile.allergies or []))
+    return required, forbidden
+
+def is_suitable(recipe, required, forbidden):
+    return recipe.diet_mask & required == required and not recipe.allergen_mask & forbidden
+
+def filter_suitable(queryset, required, forbidden):
+    """Restrict a Recipe queryset to recipes satisfying the diets and free of the allergens"""
+    if required:
+        queryset = queryset.alias(diet_bits=F('diet_mask').bitand(required)).filter(diet_bits=required)
+    if forbidden:
+        queryset = queryset.alias(allergen_bits=F('allergen_mask').bitand(forbidden)).filter(allergen_bits=0)
+    return queryset
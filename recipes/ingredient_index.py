@@ -0,0 +1,90 @@
+from django.db import transaction
+from django.db.models import Count, F, Q
+from .ingredients import canonical_ingredient
+from .models import Recipe, RecipeIngredientToken
+
+class IngredientIndex:
+    """Find-by-ingredients over stored recipes, backed by RecipeIngredientToken.
+
+    Every ingredient line is indexed under its canonical ingredient id, so
+    "2 uien" in a recipe matches "Onion" in the fridge.
+    """
+
+    @classmethod
+    def index_recipe(cls, recipe):
+        """(Re)build the index entries of a single recipe"""
+        cls.index_recipes([recipe])
+
+    @classmethod
+    def index_recipes(cls, recipes):
+        """(Re)build the index entries of several recipes with one delete and one insert"""
+        recipes = list(recipes)
+        entries = []
+        for recipe in recipes:
+            for line_number, canonical in enumerate(recipe.canonical_ingredients()):
+                if canonical:
+                    entries.append(RecipeIngredientToken(recipe=recipe, token=canonical[:100], line=line_number))
+
+        with transaction.atomic():
+            RecipeIngredientToken.objects.filter(recipe__in=[recipe.pk for recipe in recipes]).delete()
+            RecipeIngredientToken.objects.bulk_create(entries, batch_size=1000)
+
+    @classmethod
+    def rebuild(cls, batch_size=500):
+        """Re-parse the ingredients (and diet/allergen masks) of every stored recipe and rebuild the index"""
+        count = 0
+        batch = []
+        queryset = Recipe.objects.only('id', 'ingredients', 'diet_type')
+        for recipe in queryset.iterator(chunk_size=batch_size):
+            recipe.parse_ingredients()
+            batch.append(recipe)
+            if len(batch) >= batch_size:
+                cls._rebuild_batch(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            cls._rebuild_batch(batch)
+            count += len(batch)
+        return count
+
+    @classmethod
+    def _rebuild_batch(cls, recipes):
+        with transaction.atomic():
+            Recipe.objects.bulk_update(recipes, ['parsed_ingredients', 'diet_mask', 'allergen_mask'])
+            cls.index_recipes(recipes)
+
+    @staticmethod
+    def find_by_ingredients(ingredients, number=10, recipes=None):
+        """Rank stored recipes by how well the given ingredients cover them.
+
+        Like Spoonacular's ranking=2, recipes with the fewest missing ingredient
+        lines come first and ties go to the recipe using the most ingredients.
+        Returns a list of (recipe, used_count, missing_count).
+        """
+        tokens = {canonical_ingredient(ingredient) for ingredient in ingredients} - {''}
+        if not tokens:
+            return []
+
+        candidates = RecipeIngredientToken.objects.filter(token__in=tokens)
+        if recipes is not None:
+            candidates = candidates.filter(recipe__in=recipes)
+
+        ranking = (
+            RecipeIngredientToken.objects
+            .filter(recipe_id__in=candidates.values('recipe_id'))
+            .values('recipe_id')
+            .annotate(
+                total=Count('line', distinct=True),
+                used=Count('line', filter=Q(token__in=tokens), distinct=True)
+            )
+            .annotate(missing=F('total') - F('used'))
+            .order_by('missing', '-used', 'recipe_id')[:number]
+        )
+        ranking = list(ranking)
+
+        recipes_by_id = Recipe.objects.in_bulk([row['recipe_id'] for row in ranking])
+        return [
+            (recipes_by_id[row['recipe_id']], row['used'], row['missing'])
+            for row in ranking
+            if row['recipe_id'] in recipes_by_id
+        ]
@@ -0,0 +1,236 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Words that say nothing about which ingredient a line is about
+STOPWORDS = frozenset("""
+    a an and or of the to for with without in into on fresh freshly large small medium
+    chopped diced sliced minced grated peeled crushed ground whole optional taste
+    cup cups tbsp tsp tablespoon tablespoons teaspoon teaspoons oz ounce ounces lb lbs
+    pound pounds g gr gram grams kg ml l liter litre pinch dash clove cloves can cans
+    piece pieces slice slices handful bunch package
+    een en of de het van voor met zonder in op vers verse grote kleine gesneden
+    fijngehakt geraspt fijngesneden naar smaak el tl eetlepel eetlepels theelepel
+    theelepels gram kilo liter snufje teen teentjes blik stuk stuks plak plakken
+    handje bosje pak zak
+""".split())
+
+# Canonical unit -> spellings, English and Dutch
+UNITS = {
+    'g': ['g', 'gr', 'gram', 'grams', 'grammes'],
+    'kg': ['kg', 'kilo', 'kilos', 'kilogram', 'kilograms'],
+    'ml': ['ml', 'milliliter', 'milliliters', 'millilitre', 'millilitres'],
+    'cl': ['cl', 'centiliter'],
+    'dl': ['dl', 'deciliter'],
+    'l': ['l', 'liter', 'liters', 'litre', 'litres'],
+    'tbsp': ['tbsp', 'tbs', 'tablespoon', 'tablespoons', 'el', 'eetlepel', 'eetlepels'],
+    'tsp': ['tsp', 'teaspoon', 'teaspoons', 'tl', 'theelepel', 'theelepels'],
+    'cup': ['cup', 'cups', 'kop', 'kopje', 'kopjes'],
+    'oz': ['oz', 'ounce', 'ounces'],
+    'lb': ['lb', 'lbs', 'pound', 'pounds'],
+    'clove': ['clove', 'cloves', 'teen', 'teentje', 'teentjes', 'tenen'],
+    'pinch': ['pinch', 'pinches', 'snuf', 'snufje', 'snufjes'],
+    'dash': ['dash', 'scheut', 'scheutje'],
+    'can': ['can', 'cans', 'tin', 'tins', 'blik', 'blikje', 'blikjes', 'blikken'],
+    'piece': ['piece', 'pieces', 'stuk', 'stuks', 'stukje', 'stukjes'],
+    'slice': ['slice', 'slices', 'plak', 'plakje', 'plakjes', 'plakken'],
+    'bunch': ['bunch', 'bunches', 'bos', 'bosje', 'bosjes'],
+    'handful': ['handful', 'handfuls', 'handje', 'handvol'],
+    'package': ['package', 'packages', 'pack', 'packet', 'pak', 'pakje', 'pakjes', 'zak', 'zakje'],
+}
+UNIT_ALIASES = {alias: unit for unit, aliases in UNITS.items() for alias in aliases}
+
+# Canonical ingredient id -> spellings, English and Dutch
+SYNONYMS = {
+    'onion': ['onion', 'onions', 'yellow onion', 'white onion', 'ui', 'uien', 'uitje', 'uitjes'],
+    'red_onion': ['red onion', 'red onions', 'rode ui', 'rode uien'],
+    'spring_onion': ['spring onion', 'spring onions', 'scallion', 'scallions', 'green onions', 'lente-ui', 'lente-uitjes', 'bosui'],
+    'garlic': ['garlic', 'knoflook'],
+    'tomato': ['tomato', 'tomatoes', 'tomaat', 'tomaten', 'cherry tomatoes', 'cherrytomaten', 'trostomaten'],
+    'tomato_paste': ['tomato paste', 'tomato puree', 'tomatenpuree'],
+    'tomato_sauce': ['tomato sauce', 'passata', 'tomatensaus', 'tomatenblokjes'],
+    'potato': ['potato', 'potatoes', 'aardappel', 'aardappelen', 'aardappels', 'krieltjes'],
+    'sweet_potato': ['sweet potato', 'sweet potatoes', 'zoete aardappel', 'zoete aardappelen'],
+    'carrot': ['carrot', 'carrots', 'wortel', 'wortels', 'wortelen', 'winterpeen'],
+    'bell_pepper': ['bell pepper', 'bell peppers', 'red pepper', 'green pepper', 'paprika', "paprika's"],
+    'chili': ['chili', 'chilli', 'chili pepper', 'chilies', 'jalapeno', 'rode peper', 'pepers', 'chilipeper'],
+    'cucumber': ['cucumber', 'cucumbers', 'komkommer'],
+    'zucchini': ['zucchini', 'courgette', 'courgettes'],
+    'eggplant': ['eggplant', 'aubergine', 'aubergines'],
+    'mushroom': ['mushroom', 'mushrooms', 'champignon', 'champignons'],
+    'spinach': ['spinach', 'spinazie'],
+    'lettuce': ['lettuce', 'sla', 'ijsbergsla'],
+    'broccoli': ['broccoli'],
+    'cauliflower': ['cauliflower', 'bloemkool'],
+    'leek': ['leek', 'leeks', 'prei'],
+    'celery': ['celery', 'selderij', 'bleekselderij'],
+    'peas': ['peas', 'doperwten', 'erwten', 'erwtjes'],
+    'corn': ['corn', 'sweetcorn', 'maïs', 'mais'],
+    'beans': ['beans', 'kidney beans', 'black beans', 'bonen', 'kidneybonen', 'zwarte bonen'],
+    'green_beans': ['green beans', 'sperziebonen', 'snijbonen'],
+    'chickpeas': ['chickpeas', 'garbanzo beans', 'kikkererwten'],
+    'lentils': ['lentils', 'linzen'],
+    'avocado': ['avocado', 'avocados', "avocado's"],
+    'apple': ['apple', 'apples', 'appel', 'appels'],
+    'banana': ['banana', 'bananas', 'banaan', 'bananen'],
+    'lemon': ['lemon', 'lemons', 'lemon juice', 'citroen', 'citroenen', 'citroensap'],
+    'lime': ['lime', 'limes', 'lime juice', 'limoen', 'limoenen', 'limoensap'],
+    'ginger': ['ginger', 'gember'],
+    'parsley': ['parsley', 'peterselie'],
+    'basil': ['basil', 'basilicum'],
+    'coriander': ['coriander', 'cilantro', 'koriander'],
+    'chicken': ['chicken', 'chicken breast', 'chicken breasts', 'chicken thighs', 'kip', 'kipfilet', 'kippenborst', 'kippendijen', 'kipdijfilet', 'kippenpoten'],
+    'beef': ['beef', 'steak', 'rundvlees', 'biefstuk', 'riblappen'],
+    'minced_meat': ['ground beef', 'minced beef', 'minced meat', 'ground meat', 'gehakt', 'rundergehakt', 'half-om-half gehakt'],
+    'pork': ['pork', 'pork chops', 'varkensvlees', 'karbonade', 'varkenshaas'],
+    'bacon': ['bacon', 'pancetta', 'spek', 'spekjes', 'ontbijtspek'],
+    'ham': ['ham', 'hamblokjes'],
+    'sausage': ['sausage', 'sausages', 'worst', 'worstjes', 'rookworst', 'chorizo'],
+    'salmon': ['salmon', 'salmon fillet', 'zalm', 'zalmfilet'],
+    'tuna': ['tuna', 'tonijn'],
+    'white_fish': ['cod', 'white fish', 'kabeljauw', 'koolvis', 'witvis', 'pangasius'],
+    'shrimp': ['shrimp', 'shrimps', 'prawns', 'garnalen', 'garnaal', 'scampi'],
+    'tofu': ['tofu'],
+    'egg': ['egg', 'eggs', 'ei', 'eieren', 'eitje', 'eitjes'],
+    'milk': ['milk', 'whole milk', 'melk', 'volle melk', 'halfvolle melk'],
+    'butter': ['butter', 'unsalted butter', 'boter', 'roomboter'],
+    'cream': ['cream', 'heavy cream', 'whipping cream', 'room', 'slagroom', 'kookroom'],
+    'sour_cream': ['sour cream', 'creme fraiche', 'crème fraîche', 'zure room'],
+    'yogurt': ['yogurt', 'yoghurt', 'greek yogurt', 'griekse yoghurt'],
+    'cheese': ['cheese', 'kaas', 'geraspte kaas', 'cheddar', 'goudse kaas'],
+    'parmesan': ['parmesan', 'parmesan cheese', 'parmigiano', 'parmezaanse kaas', 'parmezaan'],
+    'mozzarella': ['mozzarella'],
+    'feta': ['feta', 'feta cheese', 'fetakaas'],
+    'flour': ['flour', 'all-purpose flour', 'plain flour', 'bloem', 'meel', 'tarwebloem'],
+    'sugar': ['sugar', 'white sugar', 'brown sugar', 'suiker', 'kristalsuiker', 'basterdsuiker'],
+    'honey': ['honey', 'honing'],
+    'salt': ['salt', 'sea salt', 'zout', 'zeezout'],
+    'black_pepper': ['pepper', 'black pepper', 'peper', 'zwarte peper'],
+    'olive_oil': ['olive oil', 'extra virgin olive oil', 'olijfolie'],
+    'oil': ['oil', 'vegetable oil', 'sunflower oil', 'olie', 'zonnebloemolie', 'arachideolie'],
+    'vinegar': ['vinegar', 'balsamic vinegar', 'azijn', 'balsamicoazijn'],
+    'mustard': ['mustard', 'mosterd'],
+    'soy_sauce': ['soy sauce', 'soya sauce', 'sojasaus', 'soja saus', 'ketjap', 'ketjap manis'],
+    'coconut_milk': ['coconut milk', 'kokosmelk'],
+    'stock': ['stock', 'broth', 'chicken stock', 'vegetable stock', 'bouillon', 'bouillonblokje', 'bouillonblokjes'],
+    'rice': ['rice', 'white rice', 'basmati rice', 'rijst', 'basmatirijst', 'pandanrijst', 'zilvervliesrijst'],
+    'pasta': ['pasta', 'spaghetti', 'penne', 'macaroni', 'fusilli', 'tagliatelle', 'linguine', 'lasagne'],
+    'noodles': ['noodles', 'noedels', 'mie', 'mienestjes'],
+    'bread': ['bread', 'brood', 'stokbrood', 'baguette'],
+    'tortilla': ['tortilla', 'tortillas', 'wraps', 'wrap'],
+    'nuts': ['nuts', 'walnuts', 'almonds', 'cashews', 'noten', 'walnoten', 'amandelen', 'cashewnoten'],
+    'peanuts': ['peanuts', 'pinda', "pinda's", 'pindas'],
+    'water': ['water'],
+}
+SYNONYM_LOOKUP = {
+    spelling: canonical
+    for canonical, spellings in SYNONYMS.items()
+    for spelling in spellings
+}
+MAX_SYNONYM_WORDS = max(len(spelling.split()) for spelling in SYNONYM_LOOKUP)
+
+UNICODE_FRACTIONS = {'½': 0.5, '¼': 0.25, '¾': 0.75, '⅓': 1 / 3, '⅔': 2 / 3, '⅛': 0.125}
+
+_NUMBER = r"\d+(?:[.,]\d+)?"
+LINE_RE = re.compile(
+    r"^\s*"
+    r"(?P<quantity>\d+\s*[½¼¾⅓⅔⅛]|\d+\s+\d+\s*/\s*\d+|\d+\s*/\s*\d+|" + _NUMBER + r"|[½¼¾⅓⅔⅛])?"
+    r"(?:\s*(?:-|–|to|tot)\s*" + _NUMBER + r")?"
+    r"\s*(?P<unit>" + '|'.join(sorted(map(re.escape, UNIT_ALIASES), key=len, reverse=True)) + r")?\b\.?"
+    r"\s*(?:of\s+|van\s+)?(?P<name>.*)$",
+    re.IGNORECASE | re.UNICODE
+)
+PARENTHESES_RE = re.compile(r"\([^)]*\)")
+NAME_WORD_RE = re.compile(r"[^\W\d_]+(?:['-][^\W\d_]+)*", re.UNICODE)
+
+ParsedIngredient = namedtuple('ParsedIngredient', ['quantity', 'unit', 'name', 'canonical'])
+
+def ingredient_tokens(text):
+    """Split an ingredient line into normalized tokens for matching"""
+    tokens = []
+    for word in TOKEN_RE.findall(text.lower()):
+        if len(word) < 2 or word in STOPWORDS:
+            continue
+        tokens.append(word)
+    return tokens
+
+def _parse_quantity(text):
+    if not text:
+        return None
+    text = text.replace(',', '.')
+    total = 0.0
+    if text[-1] in UNICODE_FRACTIONS:
+        total, text = UNICODE_FRACTIONS[text[-1]], text[:-1]
+    for part in text.split():
+        if '/' in part:
+            numerator, denominator = part.split('/')
+            if float(denominator) == 0:
+                return None
+            total += float(numerator) / float(denominator)
+        else:
+            total += float(part)
+    return total
+
+def singular(word):
+    """Cheap English plural stripping for words not in the synonym table"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if len(word) > 4 and word.endswith(('oes', 'ches', 'shes', 'xes', 'sses')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', "'s")):
+        return word[:-1]
+    if word.endswith("'s"):
+        return word[:-2]
+    return word
+
+def _canonical(words):
+    """Canonical id of an ingredient name: the longest synonym phrase it contains"""
+    for size in range(min(MAX_SYNONYM_WORDS, len(words)), 0, -1):
+        # Prefer the last phrase: in "chicken stock" the head noun comes last
+        for start in range(len(words) - size, -1, -1):
+            phrase = ' '.join(words[start:start + size])
+            if phrase in SYNONYM_LOOKUP:
+                return SYNONYM_LOOKUP[phrase]
+            singular_phrase = ' '.join(words[start:start + size - 1] + [singular(words[start + size - 1])])
+            if singular_phrase in SYNONYM_LOOKUP:
+                return SYNONYM_LOOKUP[singular_phrase]
+    return '_'.join(singular(word) for word in words)
+
+@lru_cache(maxsize=20000)
+def parse_ingredient(line):
+    """Split an ingredient line into quantity, unit, name and canonical id.
+
+    Handles English and Dutch lines such as "2 cups chopped onions" or
+    "1½ el olijfolie". Results are memoized per distinct string.
+    """
+    text = str(line).strip()
+    match = LINE_RE.match(text)
+    quantity = unit = None
+    name = text
+    if match:
+        try:
+            quantity = _parse_quantity(match.group('quantity'))
+        except ValueError:
+            quantity = None
+        if match.group('unit'):
+            unit = UNIT_ALIASES[match.group('unit').lower()]
+        name = match.group('name')
+
+    # Drop notes like "(about 200 g)" and everything after the first comma
+    name = PARENTHESES_RE.sub(' ', name).split(',')[0].lower()
+    words = [
+        word for word in NAME_WORD_RE.findall(name)
+        if word not in STOPWORDS or word in SYNONYM_LOOKUP
+    ]
+    name = ' '.join(words)
+    return ParsedIngredient(quantity, unit, name, _canonical(words) if words else '')
+
+def canonical_ingredient(text):
+    """Canonical id of a free-text ingredient, e.g. a fridge item name"""
+    return parse_ingredient(text).canonical
+
+def parse_ingredient_lines(lines):
+    """Parsed ingredients of a recipe, in the JSON form stored on Recipe.parsed_ingredients"""
+    return [parse_ingredient(line)._asdict() for line in lines]
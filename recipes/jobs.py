@@ -0,0 +1,115 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Q
+from django.utils import timezone
+from .models import RecommendationJob, UserRecommendationSet
+from .services import RecipeRecommendationService
+
+_job_executor = None
+_job_executor_lock = threading.Lock()
+
+def get_job_executor():
+    """Return the in-process pool that runs recommendation jobs.
+
+    Kept separate from the outbound API pool, which the jobs themselves use.
+    """
+    global _job_executor
+    with _job_executor_lock:
+        if _job_executor is None:
+            _job_executor = ThreadPoolExecutor(
+                max_workers=settings.RECOMMENDATION_JOB_WORKERS,
+                thread_name_prefix='recommendation-job'
+            )
+    return _job_executor
+
+def expire_stale_jobs(user=None):
+    """Fail jobs that have been queued or running for longer than RECOMMENDATION_JOB_STALE_AFTER.
+
+    A restart drops the in-process queue and a crash mid-run leaves a job
+    running, so such jobs would otherwise never finish.
+    """
+    cutoff = timezone.now() - timedelta(seconds=settings.RECOMMENDATION_JOB_STALE_AFTER)
+    jobs = RecommendationJob.objects.all() if user is None else RecommendationJob.objects.filter(user=user)
+    stale = Q(status=RecommendationJob.STATUS_RUNNING, started_at__lt=cutoff)
+    if settings.RECOMMENDATION_JOBS_IN_PROCESS:
+        # run_recommendation_worker reads its queue from the table, so only the in-process queue loses jobs
+        stale |= Q(status=RecommendationJob.STATUS_PENDING, created_at__lt=cutoff)
+    return jobs.filter(stale).update(
+        status=RecommendationJob.STATUS_FAILED, error='Job expired', finished_at=timezone.now()
+    )
+
+def enqueue_recommendation_job(user):
+    """Queue a recommendation run for a user, reusing one that is still queued or running"""
+    expire_stale_jobs(user)
+    job = RecommendationJob.objects.filter(
+        user=user,
+        status__in=[RecommendationJob.STATUS_PENDING, RecommendationJob.STATUS_RUNNING]
+    ).order_by('-created_at').first()
+    if job:
+        return job
+
+    job = RecommendationJob.objects.create(user=user)
+    if settings.RECOMMENDATION_JOBS_IN_PROCESS:
+        transaction.on_commit(lambda: get_job_executor().submit(run_recommendation_job, job.id))
+    return job
+
+def run_recommendation_job(job_id):
+    """Claim and run a single job; returns False if another worker claimed it first"""
+    try:
+        claimed = RecommendationJob.objects.filter(
+            id=job_id, status=RecommendationJob.STATUS_PENDING
+        ).update(status=RecommendationJob.STATUS_RUNNING, started_at=timezone.now())
+        if not claimed:
+            return False
+
+        try:
+            job = RecommendationJob.objects.select_related('user').get(id=job_id)
+            recommendation_set, created = UserRecommendationSet.objects.get_or_create(user=job.user)
+            recipes = compute_recommendations(job.user)
+            recipe_ids = [recipe.id for recipe in recipes]
+
+            # Materialize the results, unless fridge or profile changed while we ran
+            UserRecommendationSet.objects.filter(
+                id=recommendation_set.id, version=recommendation_set.version
+            ).update(recipe_ids=recipe_ids, is_dirty=False, computed_at=timezone.now())
+            RecommendationJob.objects.filter(id=job_id).update(
+                status=RecommendationJob.STATUS_DONE, recipe_ids=recipe_ids, finished_at=timezone.now()
+            )
+        except Exception as e:
+            print(f"Error running recommendation job {job_id}: {e}")
+            RecommendationJob.objects.filter(id=job_id).update(
+                status=RecommendationJob.STATUS_FAILED, error=str(e), finished_at=timezone.now()
+            )
+        return True
+    finally:
+        close_old_connections()
+
+def compute_recommendations(user):
+    """Run the recommendation pipeline for a user; it records the results itself"""
+    fridge_items = list(user.fridge_items.all())
+    if not fridge_items:
+        return []
+
+    recommendation_service = RecipeRecommendationService()
+    return recommendation_service.get_recommendations(
+        user=user,
+        fridge_items=fridge_items
+    )
+
+def process_pending_jobs(limit=None):
+    """Run queued jobs oldest first; used by the run_recommendation_worker command"""
+    expire_stale_jobs()
+    job_ids = RecommendationJob.objects.filter(
+        status=RecommendationJob.STATUS_PENDING
+    ).order_by('created_at').values_list('id', flat=True)
+    if limit:
+        job_ids = job_ids[:limit]
+
+    processed = 0
+    for job_id in list(job_ids):
+        if run_recommendation_job(job_id):
+            processed += 1
+    return processed
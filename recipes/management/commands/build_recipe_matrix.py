@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from recipes.scoring import RecipeMatrix
+
+class Command(BaseCommand):
+    help = 'Build the memory-mapped recipe x ingredient matrix used for local scoring'
+
+    def handle(self, *args, **options):
+        try:
+            count = RecipeMatrix.build()
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully built recipe matrix for {count} recipes')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error building recipe matrix: {e}')
+            )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from recipes.query_plans import check_query_plans
+
+class Command(BaseCommand):
+    help = 'Check that the hot queries are planned on their indexes (exits non-zero otherwise)'
+
+    def handle(self, *args, **options):
+        failures = []
+        for description, index_names, vendor, plan, ok in check_query_plans():
+            if plan is None:
+                self.stdout.write(f'SKIP {description} (requires {vendor})')
+            elif ok:
+                self.stdout.write(self.style.SUCCESS(f'OK   {description}'))
+            else:
+                failures.append(description)
+                self.stdout.write(self.style.ERROR(f'FAIL {description}, expected one of {index_names}:\n{plan}'))
+
+        if failures:
+            raise CommandError(f'{len(failures)} hot queries do not use their indexes')
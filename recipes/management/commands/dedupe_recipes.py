@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from recipes.dedupe import DuplicateIndex
+
+class Command(BaseCommand):
+    help = 'Find near-duplicate recipes and merge each cluster into its oldest recipe'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threshold', type=float, help='Jaccard similarity to merge at (default RECIPE_DEDUPE_THRESHOLD)')
+        parser.add_argument('--dry-run', action='store_true', help='Only report the clusters that would be merged')
+
+    def handle(self, *args, **options):
+        try:
+            merges = DuplicateIndex.run(threshold=options['threshold'], dry_run=options['dry_run'])
+            for canonical_id, duplicate_ids in merges:
+                self.stdout.write(f"{canonical_id} <- {', '.join(str(i) for i in duplicate_ids)}")
+            action = 'Would merge' if options['dry_run'] else 'Merged'
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{action} {sum(len(ids) for canonical_id, ids in merges)} duplicates into {len(merges)} recipes'
+                )
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error deduplicating recipes: {e}')
+            )
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from recipes.ingredient_index import IngredientIndex
+
+class Command(BaseCommand):
+    help = 'Re-parse ingredients and rebuild the local ingredient index for all stored recipes'
+
+    def handle(self, *args, **options):
+        try:
+            count = IngredientIndex.rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(f'Successfully indexed {count} recipes')
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error rebuilding ingredient index: {e}')
+            )
@@ -0,0 +1,111 @@
+import json
+import platform
+import sys
+import tempfile
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from benchmarks.runner import compare, run_scenario
+from benchmarks.scenarios import build_scenarios
+from benchmarks.stubs import SERVICES, StubUpstreams
+
+def parse_latencies(values):
+    """--latency 0.05 sets the default, --latency openai=0.8 one service"""
+    default, per_service = 0.05, {}
+    for value in values or []:
+        service, _, seconds = value.rpartition('=')
+        if service and service not in SERVICES:
+            raise CommandError(f'Unknown service {service!r}, expected one of {", ".join(SERVICES)}')
+        try:
+            seconds = float(seconds)
+        except ValueError:
+            raise CommandError(f'Invalid latency {value!r}')
+        if service:
+            per_service[service] = seconds
+        else:
+            default = seconds
+    return default, per_service
+
+class Command(BaseCommand):
+    help = 'Benchmark the recommendation and shopping hot paths against local upstream stand-ins'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--latency', action='append', metavar='[SERVICE=]SECONDS',
+                            help=f'Stub latency, default 0.05s; services: {", ".join(SERVICES)}')
+        parser.add_argument('--recipes', type=int, default=500, help='Recipes to seed')
+        parser.add_argument('--bonus-items', type=int, default=300, help='Bonus items to seed')
+        parser.add_argument('--scenario', action='append', help='Only run these scenarios')
+        parser.add_argument('--output', help='Write the JSON results to this file instead of stdout')
+        parser.add_argument('--baseline', help='Previous results to compare against; exits non-zero on regressions')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed relative growth before a regression')
+
+    def handle(self, *args, **options):
+        default_latency, latencies = parse_latencies(options['latency'])
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as f:
+                baseline = json.load(f)
+
+        with StubUpstreams(latency=latencies, default_latency=default_latency) as stubs, \
+                tempfile.TemporaryDirectory(prefix='benchmark-') as workdir:
+            overrides = stubs.settings_overrides()
+            overrides.update(
+                CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'benchmarks'}},
+                RECIPE_MATRIX_DIR=f'{workdir}/recipe_matrix',
+                RECOMMENDER_MODEL_DIR=f'{workdir}/recommender',
+                HTTP_MAX_RETRIES=0,
+            )
+            # Never touch the real database: benchmark against a throwaway test database
+            old_name = connection.settings_dict['NAME']
+            connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                with override_settings(**overrides):
+                    scenarios = build_scenarios(options['recipes'], options['bonus_items'])
+                    if options['scenario']:
+                        scenarios = [scenario for scenario in scenarios if scenario.name in options['scenario']]
+                    results = {}
+                    for scenario in scenarios:
+                        self.stderr.write(f'Running {scenario.name}...')
+                        results[scenario.name] = run_scenario(
+                            scenario, stubs, iterations=options['iterations'], warmup=options['warmup']
+                        )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        document = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'iterations': options['iterations'],
+                'warmup': options['warmup'],
+                'recipes': options['recipes'],
+                'bonus_items': options['bonus_items'],
+                'latency_s': {service: latencies.get(service, default_latency) for service in SERVICES},
+            },
+            'scenarios': results,
+        }
+
+        output = json.dumps(document, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(output + '\n')
+            for name, result in results.items():
+                latency = result['latency_ms']
+                self.stdout.write(
+                    f"{name}: p50 {latency['p50']}ms p95 {latency['p95']}ms, "
+                    f"{result['sql_queries']['mean']} queries, {result['outbound_calls']['per_iteration']} calls"
+                )
+        else:
+            sys.stdout.write(output + '\n')
+
+        if baseline is not None:
+            regressions = compare(document, baseline, options['tolerance'])
+            if regressions:
+                raise CommandError('Regressions against baseline:\n' + '\n'.join(regressions))
+            self.stdout.write(self.style.SUCCESS('No regressions against baseline'))
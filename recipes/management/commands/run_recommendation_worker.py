@@ -0,0 +1,29 @@
+import time
+from django.core.management.base import BaseCommand
+from recipes.jobs import process_pending_jobs
+
+class Command(BaseCommand):
+    help = 'Process queued recommendation jobs from the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Process the current queue and exit')
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            try:
+                count = process_pending_jobs()
+                if count:
+                    self.stdout.write(
+                        self.style.SUCCESS(f'Processed {count} recommendation jobs')
+                    )
+            except Exception as e:
+                self.stdout.write(
+                    self.style.ERROR(f'Error processing recommendation jobs: {e}')
+                )
+                count = 0
+
+            if options['once']:
+                break
+            if not count:
+                time.sleep(options['interval'])
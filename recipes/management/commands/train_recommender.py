@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from recipes.collaborative import train
+
+class Command(BaseCommand):
+    help = 'Train the collaborative-filtering model from recipe ratings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Retrain from scratch instead of updating the previous model')
+        parser.add_argument('--factors', type=int, default=16)
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--reg', type=float, default=0.1)
+
+    def handle(self, *args, **options):
+        try:
+            summary = train(
+                factors=options['factors'],
+                iterations=options['iterations'],
+                reg=options['reg'],
+                full=options['full']
+            )
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Trained on {summary['ratings']} ratings: {summary['users']} users, {summary['items']} recipes "
+                    f"({summary['updated_users']} users and {summary['updated_items']} recipes updated)"
+                )
+            )
+        except Exception as e:
+            self.stdout.write(
+                self.style.ERROR(f'Error training recommender: {e}')
+            )
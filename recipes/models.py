@@ -1,5 +1,7 @@
 from django.db import models
 from accounts.models import User
+from .dietary import recipe_masks
+from .ingredients import parse_ingredient_lines
 
 class Recipe(models.Model):
     DIFFICULTY_CHOICES = [
@@ -11,6 +13,7 @@ class Recipe(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     ingredients = models.JSONField()  # List of ingredients with quantities
+    parsed_ingredients = models.JSONField(default=list, blank=True)  # quantity/unit/name/canonical per line
     instructions = models.TextField()
     prep_time = models.IntegerField(help_text="Preparation time in minutes")
     cook_time = models.IntegerField(help_text="Cooking time in minutes")
@@ -18,14 +21,50 @@ class Recipe(models.Model):
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default='medium')
     cuisine_type = models.CharField(max_length=50, blank=True)
     diet_type = models.JSONField(default=list, blank=True)  # vegetarian, vegan, etc.
+    diet_mask = models.PositiveIntegerField(default=0)  # diets satisfied, bits from recipes.dietary.DIET_BITS
+    allergen_mask = models.PositiveIntegerField(default=0)  # allergens present, bits from recipes.dietary.ALLERGEN_BITS
     image_url = models.URLField(blank=True)
     source_url = models.URLField(blank=True)
     spoonacular_id = models.IntegerField(null=True, blank=True, unique=True)
+    prompt_fingerprint = models.CharField(max_length=64, null=True, blank=True, unique=True)  # AI generation inputs
+    version = models.PositiveIntegerField(default=1)  # bumped on every save, keys the cached detail fragment
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        extra_fields = set()
+        if update_fields is None or {'ingredients', 'diet_type'} & set(update_fields):
+            self.parse_ingredients()
+            extra_fields.update(['parsed_ingredients', 'diet_mask', 'allergen_mask'])
+        if not self._state.adding:
+            self.version += 1
+            extra_fields.add('version')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | extra_fields
+        super().save(*args, **kwargs)
+    
+    def ingredient_lines(self):
+        ingredients = self.ingredients or []
+        if isinstance(ingredients, str):
+            ingredients = ingredients.split('\n')
+        return [str(line) for line in ingredients]
+    
+    def parse_ingredients(self):
+        """Fill parsed_ingredients and the diet/allergen masks; bulk_create callers must call this themselves"""
+        self.parsed_ingredients = parse_ingredient_lines(self.ingredient_lines())
+        self.diet_mask, self.allergen_mask = recipe_masks(
+            self.parsed_ingredients, self.diet_type, lines=self.ingredient_lines()
+        )
+    
+    def canonical_ingredients(self):
+        """Canonical ingredient id of every ingredient line"""
+        if len(self.parsed_ingredients or []) != len(self.ingredient_lines()):
+            self.parse_ingredients()
+        return [parsed['canonical'] for parsed in self.parsed_ingredients]
+    
     @property
     def total_time(self):
         return self.prep_time + self.cook_time
@@ -36,10 +75,16 @@ class RecipeRecommendation(models.Model):
     recommended_at = models.DateTimeField(auto_now_add=True)
     reason = models.TextField(blank=True)  # Why this recipe was recommended
     user_rating = models.IntegerField(null=True, blank=True, choices=[(i, i) for i in range(1, 6)])
+    rated_at = models.DateTimeField(null=True, blank=True)
     user_feedback = models.TextField(blank=True)
     
     class Meta:
-        unique_together = ['user', 'recipe', 'recommended_at']
+        # One row per user and recipe; recommending again refreshes recommended_at
+        unique_together = ['user', 'recipe']
+        indexes = [
+            models.Index(fields=['user', '-recommended_at'], name='rec_user_recent_idx'),
+            models.Index(fields=['recipe'], condition=models.Q(user_rating__isnull=False), name='rec_rated_recipe_idx'),
+        ]
     
     def __str__(self):
         return f"{self.recipe.title} recommended to {self.user.email}"
@@ -52,6 +97,116 @@ class SavedRecipe(models.Model):
     
     class Meta:
         unique_together = ['user', 'recipe']
+        indexes = [
+            models.Index(fields=['user', '-saved_at'], name='saved_user_recent_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.recipe.title} saved by {self.user.email}"
+
+class RecipeIngredientToken(models.Model):
+    """Inverted index entry: a normalized token in one ingredient line of a recipe"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_tokens')
+    token = models.CharField(max_length=100, db_index=True)
+    line = models.PositiveSmallIntegerField()  # Position of the ingredient line in Recipe.ingredients
+    
+    class Meta:
+        unique_together = ['recipe', 'token', 'line']
+    
+    def __str__(self):
+        return f"{self.token} in {self.recipe_id}"
+
+class RecipeSignatureBand(models.Model):
+    """LSH bucket of one band of a recipe's MinHash signature, see recipes.dedupe"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='signature_bands')
+    band = models.PositiveSmallIntegerField()
+    bucket = models.BigIntegerField()
+    
+    class Meta:
+        unique_together = ['recipe', 'band']
+        indexes = [
+            models.Index(fields=['band', 'bucket'], name='sigband_bucket_idx'),
+        ]
+    
+    def __str__(self):
+        return f"band {self.band} of {self.recipe_id}"
+
+class RecipeAlias(models.Model):
+    """Source id or AI fingerprint of a recipe merged into another one, see recipes.dedupe"""
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='aliases')
+    spoonacular_id = models.IntegerField(null=True, blank=True, unique=True)
+    prompt_fingerprint = models.CharField(max_length=64, null=True, blank=True, unique=True)
+    
+    def __str__(self):
+        return f"alias of {self.recipe_id}"
+    
+    @classmethod
+    def resolve_spoonacular(cls, spoonacular_ids):
+        """Map Spoonacular ids to the recipes they were merged into"""
+        aliases = cls.objects.filter(spoonacular_id__in=spoonacular_ids).select_related('recipe')
+        return {alias.spoonacular_id: alias.recipe for alias in aliases}
+    
+    @classmethod
+    def resolve_fingerprint(cls, fingerprint):
+        alias = cls.objects.filter(prompt_fingerprint=fingerprint).select_related('recipe').first()
+        return alias.recipe if alias else None
+
+class RecipeGenerationClaim(models.Model):
+    """Claim of one worker on generating the AI recipe of a prompt fingerprint"""
+    fingerprint = models.CharField(max_length=64, unique=True)
+    claimed_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"generating {self.fingerprint}"
+
+
+class RecommendationJob(models.Model):
+    """Queued run of the recommendation pipeline for one user"""
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'In wachtrij'),
+        (STATUS_RUNNING, 'Bezig'),
+        (STATUS_DONE, 'Klaar'),
+        (STATUS_FAILED, 'Mislukt'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recommendation_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    recipe_ids = models.JSONField(default=list, blank=True)  # Recommended recipes, in order
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        indexes = [
+            # The queue: only pending jobs, oldest first
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'), name='job_pending_idx'),
+            models.Index(fields=['user', 'status'], name='job_user_status_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Recommendation job {self.id} for {self.user.email} ({self.status})"
+    
+    @property
+    def is_finished(self):
+        return self.status in (self.STATUS_DONE, self.STATUS_FAILED)
+
+
+class UserRecommendationSet(models.Model):
+    """Materialized recommendations of a user, recomputed when fridge or profile change"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='recommendation_set')
+    recipe_ids = models.JSONField(default=list, blank=True)  # Recommended recipes, in order
+    is_dirty = models.BooleanField(default=True)
+    version = models.PositiveIntegerField(default=0)  # Bumped on every invalidation
+    computed_at = models.DateTimeField(null=True, blank=True)
     
     def __str__(self):
-        return f"{self.recipe.title} saved by {self.user.email}"
\ No newline at end of file
+        return f"Recommendations for {self.user.email}"
+    
+    @classmethod
+    def mark_dirty(cls, *user_ids):
+        cls.objects.filter(user_id__in=user_ids).update(is_dirty=True, version=models.F('version') + 1)
@@ -0,0 +1,59 @@
+import base64
+import hashlib
+import json
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+class InvalidCursor(ValueError):
+    pass
+
+def encode_cursor(timestamp, pk):
+    payload = json.dumps([timestamp.isoformat(), pk]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        timestamp, pk = json.loads(payload)
+        timestamp = parse_datetime(timestamp)
+    except (ValueError, TypeError):
+        raise InvalidCursor(cursor)
+    if timestamp is None or not isinstance(pk, int):
+        raise InvalidCursor(cursor)
+    return timestamp, pk
+
+def page_size_param(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a page_size query parameter; raises ValueError if it is not a number"""
+    if value in (None, ''):
+        return default
+    return min(max(int(value), 1), MAX_PAGE_SIZE)
+
+def keyset_page(queryset, time_field, fields, cursor=None, page_size=DEFAULT_PAGE_SIZE):
+    """One page of `queryset`, newest first, as values_list rows of `fields`.
+
+    Rows are ordered by (time_field, id) descending and the page starts
+    after the cursor, so every page is a single range scan on a
+    (user, -time_field) index no matter how deep the client pages.
+    `fields` must start with 'id' and time_field. Returns (rows, next_cursor).
+    """
+    if cursor:
+        timestamp, pk = decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{time_field}__lt': timestamp}) | Q(**{time_field: timestamp, 'id__lt': pk})
+        )
+    rows = list(
+        queryset.order_by(f'-{time_field}', '-id').values_list(*fields)[:page_size + 1]
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0])
+    return rows, next_cursor
+
+def rows_etag(rows, *extra):
+    """Strong ETag over the exact values a page is rendered from"""
+    digest = hashlib.sha256(repr((rows, extra)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
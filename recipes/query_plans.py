@@ -0,0 +1,52 @@
+from django.db import connection, transaction
+from django.utils import timezone
+from shopping.models import AHBonusItem, ShoppingList
+from .models import Recipe, RecipeRecommendation, RecommendationJob, SavedRecipe
+
+def hot_queries():
+    """(description, queryset, acceptable index names, required vendor) of our hot filters"""
+    today = timezone.now().date()
+    return [
+        ('recommendations by user, newest first',
+         RecipeRecommendation.objects.filter(user_id=1).order_by('-recommended_at'),
+         ['rec_user_recent_idx'], None),
+        ('rated recommendations',
+         RecipeRecommendation.objects.filter(user_rating__isnull=False).values('recipe_id', 'user_rating'),
+         ['rec_rated_recipe_idx'], None),
+        ('saved recipes by user, newest first',
+         SavedRecipe.objects.filter(user_id=1).order_by('-saved_at'),
+         ['saved_user_recent_idx'], None),
+        ('current bonus items by discount',
+         AHBonusItem.objects.filter(valid_until__gte=today).order_by('-discount_percentage', 'name'),
+         ['bonus_valid_discount_idx', 'bonus_discount_name_idx'], None),
+        ('shopping lists by user, newest first',
+         ShoppingList.objects.filter(user_id=1).order_by('-created_at'),
+         ['shoplist_user_recent_idx'], None),
+        ('pending recommendation jobs',
+         RecommendationJob.objects.filter(status=RecommendationJob.STATUS_PENDING).order_by('created_at'),
+         ['job_pending_idx'], None),
+        ('recipes by diet',
+         Recipe.objects.filter(diet_type__contains=['vegan']),
+         ['recipe_diet_type_gin'], 'postgresql'),
+    ]
+
+def query_plan(queryset):
+    """The database's plan for a queryset, planned as if its tables were large"""
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            # Small test tables are cheaper to scan than to look up in an index
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        return queryset.explain()
+
+def check_query_plans():
+    """Yield (description, index names, required vendor, plan, ok) for every hot query.
+
+    Queries for another database vendor are skipped with a plan of None.
+    """
+    for description, queryset, index_names, vendor in hot_queries():
+        if vendor and connection.vendor != vendor:
+            yield description, index_names, vendor, None, True
+            continue
+        plan = query_plan(queryset)
+        yield description, index_names, vendor, plan, any(name in plan for name in index_names)
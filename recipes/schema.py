@@ -0,0 +1,18 @@
+from django.db import connection
+from .models import Recipe
+
+def postgres_indexes():
+    """PostgreSQL-only indexes that cannot be declared portably in Meta.indexes"""
+    table = Recipe._meta.db_table
+    return [
+        # JSON containment, e.g. Recipe.objects.filter(diet_type__contains=['vegan'])
+        ('recipe_diet_type_gin', f'CREATE INDEX IF NOT EXISTS recipe_diet_type_gin ON {table} USING gin (diet_type jsonb_path_ops)'),
+    ]
+
+def install_postgres_indexes(**kwargs):
+    """post_migrate handler creating the PostgreSQL-only indexes"""
+    if connection.vendor != 'postgresql':
+        return
+    with connection.cursor() as cursor:
+        for name, sql in postgres_indexes():
+            cursor.execute(sql)
@@ -0,0 +1,151 @@
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from .array_store import get_array_store
+from .ingredients import canonical_ingredient
+from .models import Recipe, RecipeIngredientToken
+
+class RecipeMatrix:
+    """Sparse recipe/ingredient matrices for vectorized fridge overlap scoring.
+
+    `line_tokens` is an ingredient-line x token matrix and `recipe_lines` a
+    recipe x ingredient-line matrix. A fridge becomes a token vector, so one
+    pass of two sparse products gives the used and missing line counts of
+    every stored recipe. The arrays are written once by build_recipe_matrix
+    and memory-mapped, so all workers on a host share the same pages.
+    """
+
+    def __init__(self, vocabulary, arrays):
+        self.vocabulary = vocabulary
+        self.recipe_ids = arrays['recipe_ids']
+        self.line_counts = arrays['line_counts']
+        # Recipes stored after the build have higher ids and are not in the matrix yet
+        self.max_recipe_id = int(self.recipe_ids.max()) if len(self.recipe_ids) else 0
+        # Matrices built before the masks existed have none; rank() then skips the filter
+        self.diet_masks = arrays.get('diet_masks')
+        self.allergen_masks = arrays.get('allergen_masks')
+
+        n_recipes = len(self.recipe_ids)
+        n_lines = len(arrays['line_tokens_indptr']) - 1
+        self.line_tokens = sparse.csr_matrix(
+            (np.ones(len(arrays['line_tokens_indices']), dtype=np.int8),
+             arrays['line_tokens_indices'], arrays['line_tokens_indptr']),
+            shape=(n_lines, len(vocabulary)), copy=False
+        )
+        self.recipe_lines = sparse.csr_matrix(
+            (np.ones(len(arrays['recipe_lines_indices']), dtype=np.int32),
+             arrays['recipe_lines_indices'], arrays['recipe_lines_indptr']),
+            shape=(n_recipes, n_lines), copy=False
+        )
+
+    @staticmethod
+    def store():
+        return get_array_store(settings.RECIPE_MATRIX_DIR)
+
+    @classmethod
+    def build(cls):
+        """Build the matrices from the ingredient index and publish them atomically"""
+        vocabulary = {}
+        recipe_ids = []
+        line_counts = []
+        line_tokens_indptr = [0]
+        line_tokens_indices = []
+        recipe_lines_indptr = [0]
+
+        current_recipe = current_line = None
+        rows = (
+            RecipeIngredientToken.objects
+            .order_by('recipe_id', 'line', 'token')
+            .values_list('recipe_id', 'line', 'token')
+            .iterator(chunk_size=5000)
+        )
+        for recipe_id, line, token in rows:
+            if recipe_id != current_recipe:
+                if current_recipe is not None:
+                    line_tokens_indptr.append(len(line_tokens_indices))
+                    recipe_lines_indptr.append(len(line_tokens_indptr) - 1)
+                    line_counts.append(recipe_lines_indptr[-1] - recipe_lines_indptr[-2])
+                recipe_ids.append(recipe_id)
+                current_recipe, current_line = recipe_id, line
+            elif line != current_line:
+                line_tokens_indptr.append(len(line_tokens_indices))
+                current_line = line
+            line_tokens_indices.append(vocabulary.setdefault(token, len(vocabulary)))
+
+        if current_recipe is not None:
+            line_tokens_indptr.append(len(line_tokens_indices))
+            recipe_lines_indptr.append(len(line_tokens_indptr) - 1)
+            line_counts.append(recipe_lines_indptr[-1] - recipe_lines_indptr[-2])
+
+        masks = {
+            recipe_id: (diet_mask, allergen_mask)
+            for recipe_id, diet_mask, allergen_mask in
+            Recipe.objects.values_list('id', 'diet_mask', 'allergen_mask').iterator(chunk_size=5000)
+        }
+        arrays = {
+            'recipe_ids': np.array(recipe_ids, dtype=np.int64),
+            'diet_masks': np.array([masks.get(recipe_id, (0, 0))[0] for recipe_id in recipe_ids], dtype=np.int32),
+            'allergen_masks': np.array([masks.get(recipe_id, (0, 0))[1] for recipe_id in recipe_ids], dtype=np.int32),
+            'line_counts': np.array(line_counts, dtype=np.int32),
+            'line_tokens_indptr': np.array(line_tokens_indptr, dtype=np.int32),
+            'line_tokens_indices': np.array(line_tokens_indices, dtype=np.int32),
+            'recipe_lines_indptr': np.array(recipe_lines_indptr, dtype=np.int32),
+            'recipe_lines_indices': np.arange(len(line_tokens_indptr) - 1, dtype=np.int32),
+        }
+
+        cls.store().publish(arrays, meta={'vocabulary': vocabulary})
+        return len(recipe_ids)
+
+    @classmethod
+    def load(cls):
+        """Return the current matrix for this process, or None if none was built"""
+        return cls.store().load(lambda arrays, meta: cls(meta['vocabulary'], arrays))
+
+    def fridge_vector(self, ingredients):
+        """Return the canonical-ingredient indicator vector of a set of fridge ingredients"""
+        columns = set()
+        for ingredient in ingredients:
+            column = self.vocabulary.get(canonical_ingredient(ingredient))
+            if column is not None:
+                columns.add(column)
+        vector = np.zeros(len(self.vocabulary), dtype=np.int8)
+        vector[list(columns)] = 1
+        return vector
+
+    def score(self, ingredients):
+        """Return (used, missing) ingredient line counts for every recipe row"""
+        covered_lines = (self.line_tokens @ self.fridge_vector(ingredients)) > 0
+        used = self.recipe_lines @ covered_lines.astype(np.int32)
+        return used, self.line_counts - used
+
+    def suitable(self, required=0, forbidden=0):
+        """Boolean row mask of recipes satisfying the diet bits and free of the allergen bits"""
+        suitable = np.ones(len(self.recipe_ids), dtype=bool)
+        if self.diet_masks is not None and required:
+            suitable &= (self.diet_masks & required) == required
+        if self.allergen_masks is not None and forbidden:
+            suitable &= (self.allergen_masks & forbidden) == 0
+        return suitable
+
+    def order(self, ingredients, required=0, forbidden=0):
+        """Every suitable recipe sharing a line with the fridge, fewest missing then most used lines first.
+
+        Returns (recipe_ids, used, missing) arrays in that order.
+        """
+        if not len(self.recipe_ids):
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, empty
+        used, missing = self.score(ingredients)
+        candidates = np.flatnonzero((used > 0) & self.suitable(required, forbidden))
+        rows = candidates[np.lexsort((-used[candidates], missing[candidates]))]
+        return self.recipe_ids[rows], used[rows], missing[rows]
+
+    def rank(self, ingredients, number=10, required=0, forbidden=0):
+        """Rank suitable recipes by fewest missing, then most used lines.
+
+        `required` and `forbidden` are diet and allergen bits, see
+        recipes.dietary.profile_masks. Returns a list of
+        (recipe_id, used_count, missing_count).
+        """
+        recipe_ids, used, missing = self.order(ingredients, required, forbidden)
+        return list(zip(recipe_ids[:number].tolist(), used[:number].tolist(), missing[:number].tolist()))
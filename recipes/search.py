@@ -0,0 +1,141 @@
+import re
+from django.db import connection
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+from .models import Recipe
+
+FTS_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+def fts_table():
+    return f'{Recipe._meta.db_table}_fts'
+
+def install_search_schema(**kwargs):
+    """post_migrate handler creating the full-text search structures for this database.
+
+    PostgreSQL gets a generated tsvector column with a GIN index; SQLite gets
+    an FTS5 shadow table kept in sync by triggers.
+    """
+    table = Recipe._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f"""
+                ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS (
+                    setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                    setweight(jsonb_to_tsvector('simple', coalesce(ingredients, '[]'::jsonb), '["string"]'), 'B') ||
+                    setweight(to_tsvector('simple', coalesce(description, '')), 'C') ||
+                    setweight(to_tsvector('simple', coalesce(instructions, '')), 'D')
+                ) STORED
+            """)
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS recipe_search_vector_gin ON {table} USING gin (search_vector)')
+
+        elif connection.vendor == 'sqlite':
+            fts = fts_table()
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [fts])
+            exists = cursor.fetchone() is not None
+            columns = 'title, description, instructions, ingredients'
+            new_columns = 'new.title, new.description, new.instructions, new.ingredients'
+            old_columns = 'old.title, old.description, old.instructions, old.ingredients'
+
+            cursor.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                    {columns}, content='{table}', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_columns});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+                END
+            """)
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE ON {table} BEGIN
+                    INSERT INTO {fts}({fts}, rowid, {columns}) VALUES ('delete', old.id, {old_columns});
+                    INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new_columns});
+                END
+            """)
+            if not exists:
+                # Index the recipes stored before the shadow table existed
+                cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+def _fts5_query(query):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    words = FTS_WORD_RE.findall(query)
+    return ' '.join('"{}"*'.format(word.replace('"', '""')) for word in words)
+
+def _search_sqlite(queryset, fts_query, page, page_size):
+    """Rank and page the FTS5 matches of a filtered Recipe queryset.
+
+    MATCH runs once per query, in the FTS table: the page is selected there
+    with bm25 and the filters as an `IN` subquery, then its rows are fetched
+    by primary key. A correlated rank subquery would re-run MATCH per row.
+    """
+    fts = fts_table()
+    where, params = f'{fts} MATCH %s', [fts_query]
+    if queryset.query.where:
+        filtered_sql, filtered_params = queryset.values('id').query.sql_with_params()
+        # The unary plus keeps SQLite from handing the rowids to FTS5, which would MATCH once per rowid
+        where += f' AND +rowid IN ({filtered_sql})'
+        params += list(filtered_params)
+
+    offset = (page - 1) * page_size
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT COUNT(*) FROM {fts} WHERE {where}', params)
+        total = cursor.fetchone()[0]
+        # bm25 is lower-is-better; weights favour title, then ingredients
+        cursor.execute(
+            f'SELECT rowid, -bm25({fts}, 10.0, 2.0, 1.0, 5.0) AS rank FROM {fts} WHERE {where} '
+            f'ORDER BY rank DESC, rowid LIMIT %s OFFSET %s',
+            params + [page_size, offset]
+        )
+        ranked = cursor.fetchall()
+
+    recipes_by_id = Recipe.objects.in_bulk([recipe_id for recipe_id, rank in ranked])
+    recipes = []
+    for recipe_id, rank in ranked:
+        recipe = recipes_by_id.get(recipe_id)
+        if recipe is not None:
+            recipe.rank = rank
+            recipes.append(recipe)
+    return recipes, total
+
+def search_recipes(query, cuisine_type=None, difficulty=None, max_total_time=None, page=1, page_size=20):
+    """Ranked full-text search over title, description, instructions and ingredients.
+
+    Returns (recipes, total_count); every recipe has a `rank` attribute.
+    """
+    queryset = Recipe.objects.all()
+    if cuisine_type:
+        queryset = queryset.filter(cuisine_type=cuisine_type)
+    if difficulty:
+        queryset = queryset.filter(difficulty=difficulty)
+    if max_total_time is not None:
+        queryset = queryset.alias(total=F('prep_time') + F('cook_time')).filter(total__lte=max_total_time)
+
+    table = Recipe._meta.db_table
+    if connection.vendor == 'postgresql':
+        queryset = queryset.filter(
+            RawSQL(f"{table}.search_vector @@ websearch_to_tsquery('simple', %s)", [query], output_field=BooleanField())
+        ).annotate(
+            rank=RawSQL(f"ts_rank({table}.search_vector, websearch_to_tsquery('simple', %s))", [query], output_field=FloatField())
+        )
+    elif connection.vendor == 'sqlite':
+        fts_query = _fts5_query(query)
+        if not fts_query:
+            return [], 0
+        return _search_sqlite(queryset, fts_query, page, page_size)
+    else:
+        words = FTS_WORD_RE.findall(query)
+        condition = Q()
+        for word in words:
+            condition &= Q(title__icontains=word) | Q(description__icontains=word)
+        queryset = queryset.filter(condition).annotate(rank=RawSQL('0', [], output_field=FloatField()))
+
+    total = queryset.count()
+    offset = (page - 1) * page_size
+    recipes = list(queryset.order_by('-rank', 'id')[offset:offset + page_size])
+    return recipes, total
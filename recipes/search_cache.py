@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+
+class SearchCache:
+    """In-process LRU cache for Spoonacular ingredient searches.
+
+    Entries are fresh for `ttl` seconds. For another `stale_ttl` seconds a
+    stale entry is still served while a background refresh fetches a new one,
+    so a hit never waits on the network.
+    """
+
+    def __init__(self, max_entries, ttl, stale_ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()  # key -> (value, fetched_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refresh_errors = 0
+
+    @staticmethod
+    def make_key(ingredients, diet=None, cuisine=None, intolerances=None, number=10):
+        """Build a key that is the same for equivalent searches"""
+        return (
+            tuple(sorted({ingredient.strip().lower() for ingredient in ingredients})),
+            (diet or '').lower(),
+            (cuisine or '').lower(),
+            tuple(sorted({intolerance.strip().lower() for intolerance in intolerances or []})),
+            number
+        )
+
+    def get_or_fetch(self, key, fetch):
+        """Return the cached value for key, calling fetch() on a miss.
+
+        Exceptions raised by fetch() on a miss propagate and nothing is cached.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.stale_hits += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(target=self._refresh, args=(key, fetch), daemon=True).start()
+                    return value
+            self.misses += 1
+
+        value = fetch()
+        self._store(key, value)
+        return value
+
+    def _refresh(self, key, fetch):
+        try:
+            self._store(key, fetch())
+        except Exception as e:
+            print(f"Error refreshing search cache: {e}")
+            with self._lock:
+                self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss counters for sizing the cache"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'refresh_errors': self.refresh_errors,
+                'hit_rate': round((self.hits + self.stale_hits) / lookups, 3) if lookups else 0.0,
+            }
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+def get_search_cache():
+    """Return the search cache shared by this worker process"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                max_entries=settings.SPOONACULAR_SEARCH_CACHE_SIZE,
+                ttl=settings.SPOONACULAR_SEARCH_CACHE_TTL,
+                stale_ttl=settings.SPOONACULAR_SEARCH_CACHE_STALE_TTL
+            )
+    return _search_cache
@@ -0,0 +1,29 @@
+from rest_framework import serializers
+from .models import Recipe, RecommendationJob
+
+class RecipeSummarySerializer(serializers.ModelSerializer):
+    total_time = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Recipe
+        fields = ['id', 'title', 'description', 'image_url', 'cuisine_type', 'difficulty', 'servings', 'total_time']
+
+class RecipeSearchResultSerializer(RecipeSummarySerializer):
+    rank = serializers.FloatField(read_only=True)
+
+    class Meta(RecipeSummarySerializer.Meta):
+        fields = RecipeSummarySerializer.Meta.fields + ['rank']
+
+class RecommendationJobSerializer(serializers.ModelSerializer):
+    recipes = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RecommendationJob
+        fields = ['id', 'status', 'created_at', 'finished_at', 'error', 'recipes']
+
+    def get_recipes(self, job):
+        if job.status != RecommendationJob.STATUS_DONE:
+            return []
+        recipes_by_id = Recipe.objects.in_bulk(job.recipe_ids)
+        recipes = [recipes_by_id[recipe_id] for recipe_id in job.recipe_ids if recipe_id in recipes_by_id]
+        return RecipeSummarySerializer(recipes, many=True).data
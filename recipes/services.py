@@ -1,16 +1,60 @@
+import hashlib
 import requests
 import openai
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import timedelta
 from django.conf import settings
-from .models import Recipe
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from recipe_assistant.http_client import http_get
+from shopping.fridge_matcher import FridgeMatcher
+from .models import Recipe, RecipeAlias, RecipeGenerationClaim, RecipeRecommendation
+from .ingredient_index import IngredientIndex
+from .scoring import RecipeMatrix
+from .collaborative import FactorModel
+from .dedupe import DuplicateIndex
+from .dietary import filter_suitable, is_suitable, profile_masks
+from .search_cache import SearchCache, get_search_cache
 import json
+import numpy as np
+
+_executor = None
+_executor_lock = threading.Lock()
+
+def get_executor():
+    """Return the process-wide thread pool used for outbound API calls"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.RECOMMENDATION_MAX_WORKERS,
+                thread_name_prefix='recipe-api'
+            )
+    return _executor
 
 class SpoonacularService:
     def __init__(self):
         self.api_key = settings.SPOONACULAR_API_KEY
-        self.base_url = "https://api.spoonacular.com/recipes"
+        self.base_url = f"{settings.SPOONACULAR_BASE_URL}/recipes"
     
     def search_recipes(self, ingredients, diet=None, cuisine=None, intolerances=None, number=10):
         """Search for recipes based on ingredients and preferences"""
+        key = SearchCache.make_key(ingredients, diet, cuisine, intolerances, number)
+        
+        try:
+            return get_search_cache().get_or_fetch(
+                key,
+                lambda: self._find_by_ingredients(ingredients, diet, cuisine, intolerances, number)
+            )
+        except requests.RequestException as e:
+            print(f"Error fetching recipes from Spoonacular: {e}")
+            return []
+    
+    def _find_by_ingredients(self, ingredients, diet, cuisine, intolerances, number):
+        """Call findByIngredients, raising requests.RequestException on failure"""
         url = f"{self.base_url}/findByIngredients"
         params = {
             'apiKey': self.api_key,
@@ -27,13 +71,9 @@ class SpoonacularService:
         if intolerances:
             params['intolerances'] = ','.join(intolerances)
         
-        try:
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error fetching recipes from Spoonacular: {e}")
-            return []
+        response = http_get(url, params=params)
+        response.raise_for_status()
+        return response.json()
     
     def get_recipe_details(self, recipe_id):
         """Get detailed recipe information"""
@@ -44,18 +84,104 @@ class SpoonacularService:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = http_get(url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.RequestException as e:
             print(f"Error fetching recipe details: {e}")
             return None
+    
+    def get_recipe_details_bulk(self, recipe_ids):
+        """Get detailed recipe information for several recipes in one request"""
+        if not recipe_ids:
+            return []
+        
+        url = f"{self.base_url}/informationBulk"
+        params = {
+            'apiKey': self.api_key,
+            'ids': ','.join(str(recipe_id) for recipe_id in recipe_ids),
+            'includeNutrition': False
+        }
+        
+        try:
+            response = http_get(url, params=params)
+            response.raise_for_status()
+            return response.json()
+        except requests.RequestException as e:
+            print(f"Error fetching bulk recipe details: {e}")
+            return []
 
 class AIRecipeService:
+    MODEL = "gpt-3.5-turbo"
+    
     def __init__(self):
         openai.api_key = settings.OPENAI_API_KEY
+        openai.api_base = settings.OPENAI_API_BASE
+    
+    @classmethod
+    def fingerprint(cls, ingredients, preferences, allergies, dislikes):
+        """Hash the generation inputs so equivalent requests share one recipe"""
+        def normalize(values):
+            return sorted({str(value).strip().lower() for value in values if str(value).strip()})
+        
+        payload = {
+            'model': cls.MODEL,
+            'ingredients': normalize(ingredients),
+            'cuisine': normalize(preferences.get('cuisine', [])),
+            'diet': normalize(preferences.get('diet', [])),
+            'allergies': normalize(allergies),
+            'dislikes': normalize((dislikes or '').split(',')),
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
     
     def generate_recipe(self, ingredients, preferences, allergies, dislikes):
+        """Return the recipe generated for these inputs, generating it at most once.
+        
+        Only one worker generates a given fingerprint at a time, across all
+        processes: it holds a RecipeGenerationClaim row while OpenAI runs.
+        Concurrent callers wait for its result up to AI_RECIPE_TIMEOUT.
+        """
+        fingerprint = self.fingerprint(ingredients, preferences, allergies, dislikes)
+        
+        recipe = self._find_generated(fingerprint)
+        if recipe:
+            return recipe
+        
+        if self._claim(fingerprint):
+            try:
+                return self._generate_recipe(ingredients, preferences, allergies, dislikes, fingerprint)
+            finally:
+                RecipeGenerationClaim.objects.filter(fingerprint=fingerprint).delete()
+        
+        # Another worker is generating this recipe, wait for its result
+        deadline = time.monotonic() + settings.AI_RECIPE_TIMEOUT
+        while time.monotonic() < deadline:
+            time.sleep(0.25)
+            recipe = self._find_generated(fingerprint)
+            if recipe or not RecipeGenerationClaim.objects.filter(fingerprint=fingerprint).exists():
+                return recipe
+        return None
+    
+    @staticmethod
+    def _find_generated(fingerprint):
+        """The recipe generated for a fingerprint, or the recipe it was merged into"""
+        recipe = Recipe.objects.filter(prompt_fingerprint=fingerprint).first()
+        return recipe or RecipeAlias.resolve_fingerprint(fingerprint)
+    
+    @staticmethod
+    def _claim(fingerprint):
+        """Insert the claim row for a fingerprint; False if another worker holds it"""
+        # A claim older than the generation timeout belongs to a worker that died
+        stale = timezone.now() - timedelta(seconds=settings.AI_RECIPE_TIMEOUT + 5)
+        RecipeGenerationClaim.objects.filter(fingerprint=fingerprint, claimed_at__lt=stale).delete()
+        try:
+            with transaction.atomic():
+                RecipeGenerationClaim.objects.create(fingerprint=fingerprint)
+        except IntegrityError:
+            return False
+        return True
+    
+    def _generate_recipe(self, ingredients, preferences, allergies, dislikes, fingerprint):
         """Generate a recipe using OpenAI when no suitable recipes are found"""
         
         # Build the prompt
@@ -79,29 +205,33 @@ class AIRecipeService:
         
         try:
             response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
+                model=self.MODEL,
                 messages=[
                     {"role": "system", "content": "Je bent een ervaren kok die recepten maakt op basis van beschikbare ingrediënten en voorkeuren."},
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=1000,
-                temperature=0.7
+                temperature=0.7,
+                request_timeout=settings.AI_RECIPE_TIMEOUT
             )
             
             recipe_text = response.choices[0].message.content
             recipe_data = json.loads(recipe_text)
             
-            # Create and save the recipe
-            recipe = Recipe.objects.create(
-                title=recipe_data['title'],
-                description=recipe_data['description'],
-                ingredients=recipe_data['ingredients'],
-                instructions=recipe_data['instructions'],
-                prep_time=recipe_data['prep_time'],
-                cook_time=recipe_data['cook_time'],
-                servings=recipe_data['servings'],
-                difficulty=recipe_data['difficulty'],
-                source_url='AI Generated'
+            # Create and save the recipe, unless a concurrent worker already did
+            recipe, created = Recipe.objects.get_or_create(
+                prompt_fingerprint=fingerprint,
+                defaults={
+                    'title': recipe_data['title'],
+                    'description': recipe_data['description'],
+                    'ingredients': recipe_data['ingredients'],
+                    'instructions': recipe_data['instructions'],
+                    'prep_time': recipe_data['prep_time'],
+                    'cook_time': recipe_data['cook_time'],
+                    'servings': recipe_data['servings'],
+                    'difficulty': recipe_data['difficulty'],
+                    'source_url': 'AI Generated'
+                }
             )
             
             return recipe
@@ -111,11 +241,83 @@ class AIRecipeService:
             return None
 
 class WeatherService:
+    CACHE_KEY = 'weather_influence'
+    LOCK_KEY = 'weather_refresh_lock'
+    
+    # Cities requested by this process, mapped to when they were last asked for
+    _hot_cities = {}
+    _hot_lock = threading.Lock()
+    _wakeup = threading.Event()
+    _refresher = None
+    
     def __init__(self):
         self.api_key = settings.WEATHER_API_KEY
-        self.base_url = "http://api.openweathermap.org/data/2.5/weather"
+        self.base_url = f"{settings.WEATHER_BASE_URL}/data/2.5/weather"
+    
+    @classmethod
+    def _cache_key(cls, city):
+        return f"{cls.CACHE_KEY}_{city.strip().lower().replace(' ', '_')}"
     
     def get_weather_influence(self, city="Amsterdam"):
+        """Get the cached weather influence for a city without waiting on the API.
+        
+        Returns None until the background refresher has fetched the city once.
+        """
+        if not self.api_key:
+            return None
+        
+        self._mark_hot(city)
+        cached = cache.get(self._cache_key(city))
+        if cached is None:
+            self._wakeup.set()
+            return None
+        return cached['influence']
+    
+    def _mark_hot(self, city):
+        with self._hot_lock:
+            WeatherService._hot_cities[city] = time.time()
+            if WeatherService._refresher is None or not WeatherService._refresher.is_alive():
+                WeatherService._refresher = threading.Thread(
+                    target=self._refresh_loop, name='weather-refresher', daemon=True
+                )
+                WeatherService._refresher.start()
+    
+    def _refresh_loop(self):
+        """Keep recently requested cities warm in the shared cache"""
+        while True:
+            now = time.time()
+            with self._hot_lock:
+                for city, last_requested in list(self._hot_cities.items()):
+                    if now - last_requested > settings.WEATHER_HOT_WINDOW:
+                        del WeatherService._hot_cities[city]
+                cities = list(self._hot_cities)
+            
+            for city in cities:
+                try:
+                    self.refresh_city(city)
+                except Exception as e:
+                    print(f"Error refreshing weather for {city}: {e}")
+            
+            self._wakeup.wait(settings.WEATHER_REFRESH_INTERVAL)
+            self._wakeup.clear()
+    
+    def refresh_city(self, city):
+        """Fetch the weather for a city into the shared cache if it is due"""
+        key = self._cache_key(city)
+        cached = cache.get(key)
+        if cached is not None and time.time() - cached['fetched_at'] < settings.WEATHER_CACHE_TTL - settings.WEATHER_REFRESH_INTERVAL:
+            return cached['influence']
+        
+        # Only one worker refreshes a city at a time
+        if not cache.add(f"{self.LOCK_KEY}_{key}", True, settings.WEATHER_REFRESH_INTERVAL):
+            return None
+        
+        influence = self.fetch_weather_influence(city)
+        if influence is not None:
+            cache.set(key, {'influence': influence, 'fetched_at': time.time()}, settings.WEATHER_CACHE_TTL)
+        return influence
+    
+    def fetch_weather_influence(self, city="Amsterdam"):
         """Get weather data to influence recipe recommendations"""
         if not self.api_key:
             return None
@@ -127,7 +329,7 @@ class WeatherService:
         }
         
         try:
-            response = requests.get(self.base_url, params=params)
+            response = http_get(self.base_url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -147,59 +349,243 @@ class WeatherService:
             return None
 
 class RecipeRecommendationService:
-    def __init__(self):
+    COVERAGE_TIERS = 4  # fridge coverage groups the predicted rating may reorder within
+    
+    def __init__(self, concurrent=None):
         self.spoonacular = SpoonacularService()
         self.ai_service = AIRecipeService()
         self.weather_service = WeatherService()
+        self.concurrent = settings.RECOMMENDATION_CONCURRENT if concurrent is None else concurrent
+    
+    def _run_calls(self, calls, deadline):
+        """Run (func, args) calls and return their results in call order.
+        
+        Calls that raise or are not finished by the deadline yield None.
+        """
+        if not self.concurrent:
+            results = []
+            for func, args in calls:
+                if time.monotonic() >= deadline:
+                    results.append(None)
+                    continue
+                try:
+                    results.append(func(*args))
+                except Exception as e:
+                    print(f"Error in recommendation call {func.__name__}: {e}")
+                    results.append(None)
+            return results
+        
+        executor = get_executor()
+        futures = [executor.submit(func, *args) for func, args in calls]
+        done, not_done = wait(futures, timeout=max(0, deadline - time.monotonic()))
+        
+        for future in not_done:
+            future.cancel()
+        if not_done:
+            print(f"Recommendation deadline exceeded, dropped {len(not_done)} of {len(futures)} calls")
+        
+        results = []
+        for future in futures:
+            if future in done and future.exception() is None:
+                results.append(future.result())
+            else:
+                if future in done:
+                    print(f"Error in recommendation call: {future.exception()}")
+                results.append(None)
+        return results
+    
+    @staticmethod
+    def _recipe_defaults(detailed_recipe, cuisine):
+        """Map a Spoonacular recipe information payload to Recipe fields"""
+        return {
+            'title': detailed_recipe['title'],
+            'description': detailed_recipe.get('summary', ''),
+            'ingredients': [ing['original'] for ing in detailed_recipe.get('extendedIngredients', [])],
+            'instructions': detailed_recipe.get('instructions', ''),
+            'prep_time': detailed_recipe.get('preparationMinutes', 30),
+            'cook_time': detailed_recipe.get('cookingMinutes', 30),
+            'servings': detailed_recipe.get('servings', 4),
+            'image_url': detailed_recipe.get('image', ''),
+            'source_url': detailed_recipe.get('sourceUrl', ''),
+            'cuisine_type': cuisine,
+            'diet_type': detailed_recipe.get('diets', [])
+        }
+    
+    @classmethod
+    def rank_candidates(cls, user, recipes, fridge=None):
+        """Re-order candidates by the user's predicted rating within fridge coverage tiers.
+        
+        Candidates are grouped by the share of their lines the fridge covers,
+        in COVERAGE_TIERS steps; the factor model only orders recipes within a
+        group, so a recipe the user can barely cook never outranks one they
+        fully cover. Without a trained model, or ratings for the user, the
+        tiers alone decide; ties keep their original order.
+        """
+        if len(recipes) < 2:
+            return recipes
+        
+        tiers = [
+            int(fridge.coverage(recipe) * cls.COVERAGE_TIERS) if fridge is not None else 0
+            for recipe in recipes
+        ]
+        model = FactorModel.load()
+        saved = [recipe for recipe in recipes if recipe.pk is not None]
+        scores = model.predict(user.id, [recipe.pk for recipe in saved]) if model is not None else None
+        if scores is None:
+            score_by_id, default_score = {}, 0.0
+        else:
+            score_by_id, default_score = dict(zip((recipe.pk for recipe in saved), scores.tolist())), model.global_mean
+        
+        order = sorted(
+            range(len(recipes)),
+            key=lambda i: (-tiers[i], -score_by_id.get(recipes[i].pk, default_score))
+        )
+        return [recipes[i] for i in order]
+    
+    @staticmethod
+    def _find_local(ingredients, candidates, number, required=0, forbidden=0):
+        """Rank stored recipes against the fridge, restricted to a candidate queryset.
+        
+        `required` and `forbidden` are the profile's diet and allergen bits;
+        the candidate queryset is expected to apply them too. Returns a list
+        of (recipe, used_count, missing_count).
+        """
+        matrix = RecipeMatrix.load()
+        if matrix is None:
+            return IngredientIndex.find_by_ingredients(ingredients, number=number, recipes=candidates)
+        
+        recipe_ids, used, missing = matrix.order(ingredients, required, forbidden)
+        
+        def fetch(rows):
+            recipes_by_id = candidates.in_bulk(recipe_ids[rows].tolist())
+            return [
+                (recipes_by_id[recipe_id], used_count, missing_count)
+                for recipe_id, used_count, missing_count
+                in zip(recipe_ids[rows].tolist(), used[rows].tolist(), missing[rows].tolist())
+                if recipe_id in recipes_by_id
+            ]
+        
+        # Oversample, since the matrix ranks the whole corpus before the candidate filter
+        head = min(number * 4, len(recipe_ids))
+        matches = fetch(slice(0, head))
+        if len(matches) < number and head < len(recipe_ids):
+            # A restrictive filter rejected most of them: take the rest from the recipes it lets through
+            eligible = np.fromiter(
+                candidates.filter(id__lte=matrix.max_recipe_id).values_list('id', flat=True), dtype=np.int64
+            )
+            rest = head + np.flatnonzero(np.isin(recipe_ids[head:], eligible))
+            matches += fetch(rest[:number - len(matches)])
+        
+        # Recipes stored since the matrix was built come from the live index
+        matches += IngredientIndex.find_by_ingredients(
+            ingredients, number=number, recipes=candidates.filter(id__gt=matrix.max_recipe_id)
+        )
+        matches.sort(key=lambda match: (match[2], -match[1], match[0].id))
+        return matches[:number]
+    
+    @staticmethod
+    def _is_good_match(used, missing):
+        """Whether a local match covers enough of its recipe to count towards the local target"""
+        return (
+            missing <= settings.RECOMMENDATION_MAX_MISSING
+            or used >= settings.RECOMMENDATION_MIN_COVERAGE * (used + missing)
+        )
     
     def get_recommendations(self, user, fridge_items, ah_bonus_items=None):
         """Get recipe recommendations based on user profile and available ingredients"""
         
+        deadline = time.monotonic() + settings.RECOMMENDATION_DEADLINE
+        
         # Get user preferences
         profile = user.profile
         ingredients = [item.name for item in fridge_items]
+        fridge = FridgeMatcher(ingredients)
         
-        # Get weather influence
-        weather_influence = self.weather_service.get_weather_influence()
-        
-        # Search for recipes using Spoonacular
         diet_preferences = profile.diet_preferences
         cuisine_preferences = profile.cuisine_preferences
         allergies = profile.allergies
         
-        recipes = []
+        # Get weather influence (served from cache, never waits on the API)
+        weather_influence = self.weather_service.get_weather_influence()
         
-        # Try different cuisine types from user preferences
-        for cuisine in cuisine_preferences[:2]:  # Try top 2 preferences
-            spoon_recipes = self.spoonacular.search_recipes(
-                ingredients=ingredients,
-                diet=diet_preferences[0] if diet_preferences else None,
-                cuisine=cuisine,
-                intolerances=allergies,
-                number=5
+        # Serve from our own corpus first, ranked like Spoonacular's ranking=2
+        cuisines = cuisine_preferences[:2]
+        required, forbidden = profile_masks(profile)
+        local_candidates = filter_suitable(Recipe.objects.all(), required, forbidden)
+        if cuisines:
+            local_candidates = local_candidates.filter(cuisine_type__in=cuisines + [''])
+        # Over-fetch so the personal ranking has candidates to choose from
+        matches = self._find_local(
+            ingredients, local_candidates, settings.RECOMMENDATION_LOCAL_TARGET * 2, required, forbidden
+        )
+        reason = f'Based on ingredients: {", ".join(ingredients)}'
+        # A recipe sharing only the salt with the fridge is no reason to skip Spoonacular
+        recipes = [recipe for recipe, used, missing in matches if self._is_good_match(used, missing)]
+        weak_recipes = [recipe for recipe, used, missing in matches if not self._is_good_match(used, missing)]
+        if len(recipes) >= settings.RECOMMENDATION_LOCAL_TARGET:
+            return self.save_recommendations(
+                user, self.rank_candidates(user, recipes + weak_recipes, fridge)[:5], reason
             )
+        
+        # Top up by searching the top 2 cuisine preferences concurrently
+        search_calls = [
+            (self.spoonacular.search_recipes, (
+                ingredients,
+                diet_preferences[0] if diet_preferences else None,
+                cuisine,
+                allergies,
+                5
+            ))
+            for cuisine in cuisines
+        ]
+        search_results = [spoon_recipes or [] for spoon_recipes in self._run_calls(search_calls, deadline)]
+        
+        # Collect the search hits in result order
+        hits = [
+            (cuisine, recipe_data)
+            for cuisine, spoon_recipes in zip(cuisines, search_results)
+            for recipe_data in spoon_recipes
+        ]
+        hit_ids = list(dict.fromkeys(recipe_data['id'] for cuisine, recipe_data in hits))
+        
+        # Resolve hits we already stored with a single query
+        stored = Recipe.objects.in_bulk(hit_ids, field_name='spoonacular_id')
+        # Hits merged into another recipe by the dedupe pass resolve to that recipe
+        unresolved = [recipe_id for recipe_id in hit_ids if recipe_id not in stored]
+        if unresolved:
+            stored.update(RecipeAlias.resolve_spoonacular(unresolved))
+        
+        # Fetch details for the misses in one bulk request, they are saved with the recommendations
+        missing_ids = [recipe_id for recipe_id in hit_ids if recipe_id not in stored]
+        if missing_ids:
+            cuisine_by_id = {}
+            for cuisine, recipe_data in hits:
+                cuisine_by_id.setdefault(recipe_data['id'], cuisine)
             
-            for recipe_data in spoon_recipes:
-                # Get detailed recipe information
-                detailed_recipe = self.spoonacular.get_recipe_details(recipe_data['id'])
-                if detailed_recipe:
-                    # Save or update recipe in database
-                    recipe, created = Recipe.objects.get_or_create(
-                        spoonacular_id=detailed_recipe['id'],
-                        defaults={
-                            'title': detailed_recipe['title'],
-                            'description': detailed_recipe.get('summary', ''),
-                            'ingredients': [ing['original'] for ing in detailed_recipe.get('extendedIngredients', [])],
-                            'instructions': detailed_recipe.get('instructions', ''),
-                            'prep_time': detailed_recipe.get('preparationMinutes', 30),
-                            'cook_time': detailed_recipe.get('cookingMinutes', 30),
-                            'servings': detailed_recipe.get('servings', 4),
-                            'image_url': detailed_recipe.get('image', ''),
-                            'source_url': detailed_recipe.get('sourceUrl', ''),
-                            'cuisine_type': cuisine
-                        }
-                    )
-                    recipes.append(recipe)
+            details = self._run_calls([(self.spoonacular.get_recipe_details_bulk, (missing_ids,))], deadline)[0]
+            for detailed_recipe in details or []:
+                recipe = Recipe(
+                    spoonacular_id=detailed_recipe['id'],
+                    **self._recipe_defaults(detailed_recipe, cuisine_by_id.get(detailed_recipe['id'], ''))
+                )
+                recipe.parse_ingredients()
+                stored[detailed_recipe['id']] = recipe
+        
+        # Spoonacular's diet and intolerance filters are coarser than the profile, check the masks too
+        seen_ids = {recipe.id for recipe in recipes + weak_recipes}
+        remote_recipes = []
+        for recipe_id in hit_ids:
+            recipe = stored.get(recipe_id)
+            if recipe is None or (recipe.pk is not None and recipe.pk in seen_ids):
+                continue
+            if is_suitable(recipe, required, forbidden):
+                remote_recipes.append(recipe)
+                # Several hits can resolve to the same merged recipe
+                seen_ids.add(recipe.pk)
+        # Search hits of different cuisines are not ranked against each other, order them by fridge coverage
+        remote_recipes.sort(key=lambda recipe: -fridge.coverage(recipe))
+        # Weak local matches only fill up behind what Spoonacular found
+        recipes += remote_recipes + weak_recipes
         
         # If no recipes found, try AI generation
         if not recipes:
@@ -213,6 +599,62 @@ class RecipeRecommendationService:
                 dislikes=profile.dislikes
             )
             if ai_recipe:
-                recipes.append(ai_recipe)
+                recipes.append(DuplicateIndex.resolve(ai_recipe))
+        
+        recipes = self.rank_candidates(user, recipes, fridge)
+        return self.save_recommendations(user, recipes[:5], reason)  # Return top 5 recommendations
+    
+    @staticmethod
+    def save_recommendations(user, recipes, reason=''):
+        """Save new recipes and record all of them as recommended to the user.
+        
+        Everything is written with bulk upserts in a single transaction. A
+        recipe recommended again keeps its rating and gets a fresh
+        recommended_at. Returns the saved recipes in the given order.
+        """
+        with transaction.atomic():
+            new_recipes = [recipe for recipe in recipes if recipe.pk is None]
+            if new_recipes:
+                # bulk_create skips Recipe.save(), so parse the ingredients here
+                for recipe in new_recipes:
+                    recipe.parse_ingredients()
+                # Near-duplicates of stored recipes, or of each other, are never inserted:
+                # their Spoonacular ids become aliases of the recipe they duplicate
+                duplicate_of = dict(zip(map(id, new_recipes), DuplicateIndex.find_duplicates(new_recipes)))
+                unique = [recipe for recipe in new_recipes if duplicate_of[id(recipe)] is None]
+                Recipe.objects.bulk_create(unique, ignore_conflicts=True)
+                saved = Recipe.objects.in_bulk(
+                    [recipe.spoonacular_id for recipe in unique], field_name='spoonacular_id'
+                )
+                # bulk_create skips post_save, so index the new recipes here
+                IngredientIndex.index_recipes(saved.values())
+                DuplicateIndex.index_recipes(saved.values())
+                
+                def resolve(recipe):
+                    if recipe.pk is not None:
+                        return recipe
+                    target = duplicate_of[id(recipe)]
+                    if isinstance(target, int):
+                        return saved.get(new_recipes[target].spoonacular_id)
+                    return target if target is not None else saved.get(recipe.spoonacular_id)
+                
+                RecipeAlias.objects.bulk_create(
+                    [
+                        RecipeAlias(recipe=resolve(recipe), spoonacular_id=recipe.spoonacular_id)
+                        for recipe in new_recipes
+                        if duplicate_of[id(recipe)] is not None and resolve(recipe) is not None
+                    ],
+                    ignore_conflicts=True
+                )
+                recipes = [resolved for resolved in map(resolve, recipes) if resolved is not None]
+                # Several candidates may have resolved to the same recipe
+                recipes = list({recipe.pk: recipe for recipe in recipes}.values())
+            
+            RecipeRecommendation.objects.bulk_create(
+                [RecipeRecommendation(user=user, recipe=recipe, reason=reason) for recipe in recipes],
+                update_conflicts=True,
+                unique_fields=['user', 'recipe'],
+                update_fields=['reason', 'recommended_at']
+            )
         
-        return recipes[:5]  # Return top 5 recommendations
\ No newline at end of file
+        return recipes
\ No newline at end of file
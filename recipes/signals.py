@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from accounts.models import FridgeItem, UserProfile
+from .dedupe import DuplicateIndex
+from .ingredient_index import IngredientIndex
+from .models import Recipe, UserRecommendationSet
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_ingredients(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the ingredient index in sync when a recipe's ingredients may have changed"""
+    if update_fields is not None and 'ingredients' not in update_fields:
+        return
+    IngredientIndex.index_recipe(instance)
+
+@receiver(post_save, sender=Recipe)
+def index_recipe_signature(sender, instance, created, update_fields=None, **kwargs):
+    """Keep the near-duplicate LSH buckets in sync with the title and ingredients"""
+    if update_fields is not None and not {'title', 'ingredients'} & set(update_fields):
+        return
+    DuplicateIndex.index_recipes([instance])
+
+@receiver(post_save, sender=FridgeItem)
+@receiver(post_delete, sender=FridgeItem)
+def invalidate_recommendations_on_fridge_change(sender, instance, **kwargs):
+    UserRecommendationSet.mark_dirty(instance.user_id)
+
+@receiver(post_save, sender=UserProfile)
+def invalidate_recommendations_on_profile_change(sender, instance, **kwargs):
+    UserRecommendationSet.mark_dirty(instance.user_id)
@@ -0,0 +1,175 @@
+from django.test import SimpleTestCase, TestCase
+from .dietary import ALLERGEN_BITS, DIET_BITS, recipe_masks
+from .ingredients import parse_ingredient_lines
+from .models import Recipe
+from .query_plans import check_query_plans
+from .search import search_recipes
+
+def masks(*lines, diet_type=()):
+    return recipe_masks(parse_ingredient_lines(lines), diet_type, lines=lines)
+
+def allergens(*lines):
+    allergen_mask = masks(*lines)[1]
+    return {allergen for allergen, bit in ALLERGEN_BITS.items() if allergen_mask & bit}
+
+def diets(*lines, diet_type=()):
+    diet_mask = masks(*lines, diet_type=diet_type)[0]
+    return {diet for diet, bit in DIET_BITS.items() if diet_mask & bit}
+
+class AllergenMaskTests(SimpleTestCase):
+    # Real ingredient lines and the allergens they must (and must only) carry
+    CASES = [
+        ('1 cup walnut pieces', {'nuts'}),
+        ('100 g hazelnuts', {'nuts'}),
+        ('50 g pecans', {'nuts'}),
+        ('75 g hazelnoten, grof gehakt', {'nuts'}),
+        ('2 el pijnboompitten', {'nuts'}),
+        ('1 cup almond milk', {'nuts'}),
+        ('250 ml amandelmelk', {'nuts'}),
+        ('2 tbsp peanut butter', {'nuts'}),
+        ('3 el pindakaas', {'nuts'}),
+        ('1 potje groene pesto', {'nuts'}),
+        ('500 ml soy milk', {'soy'}),
+        ('200 ml sojamelk', {'soy'}),
+        ('400 g tofu', {'soy'}),
+        ('2 el sojasaus', {'soy', 'gluten'}),
+        ('2 tbsp soy sauce', {'soy', 'gluten'}),
+        ('2 tbsp ghee', {'lactose'}),
+        ('50 g roomboter', {'lactose'}),
+        ('200 ml kookroom', {'lactose'}),
+        ('100 g geraspte Goudse kaas', {'lactose'}),
+        ('2 el crème fraîche', {'lactose'}),
+        ('400 ml kokosmelk', set()),
+        ('200 ml coconut cream', set()),
+        ('250 g lasagnebladen', {'gluten'}),
+        ('300 g volkoren spaghetti', {'gluten'}),
+        ('2 el bloem', {'gluten'}),
+        ('4 wraps', {'gluten'}),
+        ('200 g rice noodles', set()),
+        ('1 bloemkool', set()),
+        ('2 el rode currypasta', set()),
+        ('1 flesje gemberbier', set()),
+        ('250 g glutenvrije pasta', set()),
+        ('200 g gerookte zalmfilet', {'fish'}),
+        ('1 blik tonijn in olijfolie', {'fish'}),
+        ('2 el vissaus', {'fish'}),
+        ('200 g garnalen', {'shellfish'}),
+        ('1 kg mosselen', {'shellfish'}),
+        ('2 el oyster sauce', {'shellfish'}),
+        ('4 eieren', {'eggs'}),
+        ('1 ei, losgeklopt', {'eggs'}),
+        ('2 tbsp mayonnaise', {'eggs'}),
+        ('1 eggplant', set()),
+        ('1/2 tsp ground nutmeg', set()),
+        ('snufje nootmuskaat', set()),
+        ('1 el tamarindepasta', set()),
+        ('200 g oesterzwammen', set()),
+        ('1 butternut squash', set()),
+        ('250 g champignons', set()),
+        ('300 g mushrooms', set()),
+        ('2 uien', set()),
+        ('1 el olijfolie', set()),
+    ]
+
+    def test_ingredient_lines(self):
+        for line, expected in self.CASES:
+            with self.subTest(line=line):
+                self.assertEqual(allergens(line), expected)
+
+    def test_recipe_combines_lines(self):
+        self.assertEqual(allergens('250 g spaghetti', '2 eieren', '50 g parmezaan'), {'gluten', 'eggs', 'lactose'})
+
+class DietMaskTests(SimpleTestCase):
+    def test_plant_milk_stays_vegan(self):
+        self.assertIn('vegan', diets('250 ml amandelmelk', '1 banaan'))
+
+    def test_dairy_is_vegetarian_not_vegan(self):
+        self.assertEqual(diets('2 tbsp ghee', '1 ui') & {'vegan', 'vegetarian'}, {'vegetarian'})
+
+    def test_fish_is_pescatarian(self):
+        self.assertEqual(
+            diets('200 g zalmfilet') & {'vegetarian', 'pescatarian', 'meat'}, {'pescatarian', 'meat'}
+        )
+
+    def test_chopped_is_not_minced_meat(self):
+        self.assertIn('vegetarian', diets('2 uien, gehakt', '1 el olijfolie'))
+
+    def test_meat(self):
+        self.assertEqual(diets('300 g kipfilet') & {'vegetarian', 'pescatarian'}, set())
+
+    # Meat lines, often compounds, that must never be vegetarian
+    MEAT_LINES = [
+        '100 g prosciutto',
+        '8 slices pepperoni',
+        '300 g kalkoenfilet',
+        '500 g lamsgehakt',
+        '4 kippendijfilets',
+        '200 g runderlappen',
+        '500 g kipgehakt',
+        '200 g shoarmareepjes',
+        '4 lamskoteletten',
+        '200 g gerookte spekblokjes',
+        '4 hamburgers',
+        '150 g pancetta',
+        '300 g varkensvlees',
+        '500 g gehakt',
+        '2 chicken thighs',
+        '400 g beef steak',
+    ]
+    PORK_LINES = ['100 g prosciutto', '8 slices pepperoni', '200 g gerookte spekblokjes', '150 g pancetta']
+
+    def test_meat_lines(self):
+        for line in self.MEAT_LINES:
+            with self.subTest(line=line):
+                self.assertEqual(diets(line) & {'vegan', 'vegetarian', 'pescatarian'}, set())
+
+    def test_pork_is_not_halal(self):
+        for line in self.PORK_LINES:
+            with self.subTest(line=line):
+                self.assertNotIn('halal', diets(line))
+        self.assertIn('halal', diets('300 g kipfilet'))
+
+    def test_meat_lookalikes_stay_vegetarian(self):
+        for line in ['2 el fijngehakte peterselie', '1 ui, fijngehakt', '400 g kikkererwten',
+                     '1 blokje groentebouillon', '250 g vegetarische kipstukjes', '1 plak spekkoek']:
+            with self.subTest(line=line):
+                self.assertIn('vegetarian', diets(line))
+
+    def test_declared_diet_never_clears_allergen(self):
+        self.assertEqual(allergens('1 cup walnut pieces'), {'nuts'})
+        self.assertIn('vegan', diets('1 cup walnut pieces', diet_type=['vegan']))
+
+class SearchRankingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        def recipe(title, ingredients=(), description='', **fields):
+            return Recipe.objects.create(
+                title=title, description=description, ingredients=list(ingredients), instructions='',
+                prep_time=10, cook_time=10, **fields
+            )
+        cls.in_description = recipe('Zomerse ovenschotel', ['2 uien'], 'Lekker met courgette erbij')
+        cls.in_ingredients = recipe('Zomerse pasta', ['1 courgette', '250 g penne'])
+        cls.in_title = recipe('Gevulde courgette', ['2 uien'], cuisine_type='italian')
+        recipe('Tomatensoep', ['4 tomaten'])
+
+    def test_title_outranks_ingredients_outranks_description(self):
+        recipes, total = search_recipes('courgette')
+        self.assertEqual(total, 3)
+        self.assertEqual(recipes, [self.in_title, self.in_ingredients, self.in_description])
+        self.assertGreater(recipes[0].rank, recipes[1].rank)
+        self.assertGreater(recipes[1].rank, recipes[2].rank)
+
+    def test_pages_and_filters(self):
+        recipes, total = search_recipes('courgette', page=2, page_size=2)
+        self.assertEqual((recipes, total), ([self.in_description], 3))
+        recipes, total = search_recipes('courgette', cuisine_type='italian')
+        self.assertEqual((recipes, total), ([self.in_title], 1))
+
+    def test_no_words(self):
+        self.assertEqual(search_recipes('?!'), ([], 0))
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_their_indexes(self):
+        for description, index_names, vendor, plan, ok in check_query_plans():
+            with self.subTest(description):
+                self.assertTrue(ok, f'expected one of {index_names}:\n{plan}')
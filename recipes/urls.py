@@ -3,8 +3,11 @@ from . import views
 
 urlpatterns = [
     path('recipes/recommendations/', views.recipe_recommendations, name='recipe_recommendations'),
+    path('recipes/recommendations/jobs/<int:job_id>/', views.recommendation_job_status, name='recommendation_job_status'),
+    path('recipes/search/', views.search_recipes, name='search_recipes'),
     path('recipes/<int:recipe_id>/', views.recipe_detail, name='recipe_detail'),
     path('recipes/<int:recipe_id>/save/', views.save_recipe, name='save_recipe'),
     path('recipes/<int:recipe_id>/rate/', views.rate_recipe, name='rate_recipe'),
     path('recipes/saved/', views.saved_recipes, name='saved_recipes'),
+    path('recipes/saved/page/', views.saved_recipes_api, name='saved_recipes_api'),
 ]
\ No newline at end of file
@@ -1,51 +1,70 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from django.http import Http404, JsonResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from django.views.decorators.http import require_http_methods
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-from .models import Recipe, RecipeRecommendation, SavedRecipe
-from .services import RecipeRecommendationService
+from .models import Recipe, RecipeRecommendation, SavedRecipe, RecommendationJob, UserRecommendationSet
+from .detail_cache import get_recipe_fragment
+from .jobs import enqueue_recommendation_job
+from .pagination import DEFAULT_PAGE_SIZE, encode_cursor, keyset_page, page_size_param, rows_etag
+from .serializers import RecipeSearchResultSerializer, RecommendationJobSerializer
+from . import search as recipe_search
 from accounts.models import FridgeItem
 import json
 
 @login_required
 def recipe_recommendations(request):
-    """Get recipe recommendations based on user's fridge items"""
+    """Show recipe recommendations based on user's fridge items.
+    
+    Serves the materialized recommendations. When fridge or profile changed
+    since they were computed, it also queues a job; the page shows the
+    previous results meanwhile and polls recommendation_job_status for the
+    new ones.
+    """
     fridge_items = request.user.fridge_items.all()
     
     if not fridge_items.exists():
         return render(request, 'recipes/no_ingredients.html')
     
-    # Get recommendations
-    recommendation_service = RecipeRecommendationService()
-    recommended_recipes = recommendation_service.get_recommendations(
-        user=request.user,
-        fridge_items=fridge_items
-    )
+    recommendation_set = UserRecommendationSet.objects.filter(user=request.user).first()
+    recipes = []
+    if recommendation_set:
+        recipes_by_id = Recipe.objects.in_bulk(recommendation_set.recipe_ids)
+        recipes = [recipes_by_id[recipe_id] for recipe_id in recommendation_set.recipe_ids if recipe_id in recipes_by_id]
     
-    # Save recommendations to database
-    for recipe in recommended_recipes:
-        RecipeRecommendation.objects.get_or_create(
-            user=request.user,
-            recipe=recipe,
-            defaults={
-                'reason': f'Based on ingredients: {", ".join([item.name for item in fridge_items])}'
-            }
-        )
+    job = None
+    if recommendation_set is None or recommendation_set.is_dirty:
+        job = enqueue_recommendation_job(request.user)
     
     context = {
-        'recipes': recommended_recipes,
+        'recipes': recipes,
+        'job': job,
         'fridge_items': fridge_items
     }
     return render(request, 'recipes/recommendations.html', context)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def recommendation_job_status(request, job_id):
+    """Status and, once done, results of a recommendation job"""
+    job = get_object_or_404(RecommendationJob, id=job_id, user=request.user)
+    return Response(RecommendationJobSerializer(job).data)
+
 @login_required
 def recipe_detail(request, recipe_id):
-    """Show detailed recipe information"""
-    recipe = get_object_or_404(Recipe, id=recipe_id)
-    is_saved = SavedRecipe.objects.filter(user=request.user, recipe=recipe).exists()
+    """Show detailed recipe information.
+    
+    The recipe body is a cached fragment shared by all users; only the saved
+    state is looked up per request.
+    """
+    recipe = get_recipe_fragment(recipe_id)
+    if recipe is None:
+        raise Http404('Recipe not found')
+    is_saved = SavedRecipe.objects.filter(user=request.user, recipe_id=recipe_id).exists()
     
     context = {
         'recipe': recipe,
@@ -53,6 +72,38 @@ def recipe_detail(request, recipe_id):
     }
     return render(request, 'recipes/detail.html', context)
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_recipes(request):
+    """Ranked full-text search over stored recipes"""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'Search query required'}, status=400)
+    
+    try:
+        page = max(int(request.query_params.get('page', 1)), 1)
+        page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 50)
+        max_time = request.query_params.get('total_time')
+        max_time = int(max_time) if max_time else None
+    except ValueError:
+        return Response({'error': 'Invalid page, page_size or total_time'}, status=400)
+    
+    recipes, total = recipe_search.search_recipes(
+        query,
+        cuisine_type=request.query_params.get('cuisine_type'),
+        difficulty=request.query_params.get('difficulty'),
+        max_total_time=max_time,
+        page=page,
+        page_size=page_size
+    )
+    
+    return Response({
+        'count': total,
+        'page': page,
+        'page_size': page_size,
+        'results': RecipeSearchResultSerializer(recipes, many=True).data
+    })
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def save_recipe(request, recipe_id):
@@ -88,6 +139,7 @@ def rate_recipe(request, recipe_id):
     if recommendation:
         recommendation.user_rating = rating
         recommendation.user_feedback = feedback
+        recommendation.rated_at = timezone.now()
         recommendation.save()
         return Response({'success': True})
     
@@ -95,10 +147,60 @@ def rate_recipe(request, recipe_id):
 
 @login_required
 def saved_recipes(request):
-    """Show user's saved recipes"""
-    saved_recipes = SavedRecipe.objects.filter(user=request.user).select_related('recipe')
+    """Show the first page of the user's saved recipes, the rest comes from saved_recipes_api"""
+    saved_recipes = list(
+        SavedRecipe.objects.filter(user=request.user).select_related('recipe')
+        .order_by('-saved_at', '-id')[:DEFAULT_PAGE_SIZE + 1]
+    )
+    next_cursor = None
+    if len(saved_recipes) > DEFAULT_PAGE_SIZE:
+        saved_recipes = saved_recipes[:DEFAULT_PAGE_SIZE]
+        next_cursor = encode_cursor(saved_recipes[-1].saved_at, saved_recipes[-1].id)
     
     context = {
-        'saved_recipes': saved_recipes
+        'saved_recipes': saved_recipes,
+        'next_cursor': next_cursor
     }
-    return render(request, 'recipes/saved.html', context)
\ No newline at end of file
+    return render(request, 'recipes/saved.html', context)
+
+SAVED_RECIPE_FIELDS = [
+    'id', 'saved_at', 'notes', 'recipe_id', 'recipe__title', 'recipe__image_url',
+    'recipe__cuisine_type', 'recipe__difficulty', 'recipe__prep_time', 'recipe__cook_time',
+]
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def saved_recipes_api(request):
+    """Keyset-paginated saved recipes, newest first, with a strong ETag"""
+    try:
+        page_size = page_size_param(request.query_params.get('page_size'))
+        rows, next_cursor = keyset_page(
+            SavedRecipe.objects.filter(user=request.user), 'saved_at', SAVED_RECIPE_FIELDS,
+            cursor=request.query_params.get('cursor'), page_size=page_size
+        )
+    except ValueError:
+        return Response({'error': 'Invalid cursor or page_size'}, status=400)
+    
+    etag = rows_etag(rows, next_cursor)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        not_modified['ETag'] = etag
+        return not_modified
+    
+    results = [
+        {
+            'id': saved_id,
+            'saved_at': saved_at,
+            'notes': notes,
+            'recipe': {
+                'id': recipe_id,
+                'title': title,
+                'image_url': image_url,
+                'cuisine_type': cuisine_type,
+                'difficulty': difficulty,
+                'total_time': prep_time + cook_time,
+            },
+        }
+        for saved_id, saved_at, notes, recipe_id, title, image_url, cuisine_type, difficulty, prep_time, cook_time in rows
+    ]
+    return Response({'results': results, 'next_cursor': next_cursor}, headers={'ETag': etag})
\ No newline at end of file
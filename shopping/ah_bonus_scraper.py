@@ -3,12 +3,15 @@ from bs4 import BeautifulSoup
 from datetime import datetime, timedelta
 import json
 import os
+from django.conf import settings
 from django.utils import timezone
+from recipe_assistant.http_client import http_get
+from .bonus_cache import BonusCache
 from .models import AHBonusItem
 
 class AHBonusScraper:
     def __init__(self):
-        self.base_url = "https://www.ah.nl"
+        self.base_url = settings.AH_BASE_URL
         self.bonus_url = f"{self.base_url}/bonus"
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
@@ -17,7 +20,7 @@ class AHBonusScraper:
     def scrape_bonus_items(self):
         """Scrape current bonus items from AH website"""
         try:
-            response = requests.get(self.bonus_url, headers=self.headers)
+            response = http_get(self.bonus_url, headers=self.headers)
             response.raise_for_status()
             
             soup = BeautifulSoup(response.content, 'html.parser')
@@ -82,6 +85,9 @@ class AHBonusScraper:
                 defaults=item_data
             )
         
+        # Invalidate cached bonus items, matchers and recommendations
+        BonusCache.clear_cache()
+        
         print(f"Updated {len(bonus_items)} bonus items")
         return len(bonus_items)
 
@@ -1,24 +1,40 @@
 from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F
 from django.utils import timezone
-from .models import AHBonusItem
+from .bonus_matcher import get_bonus_matcher
+from .models import AHBonusItem, BonusGeneration
+import hashlib
 import json
 
 class BonusCache:
     CACHE_KEY = 'ah_bonus_items'
     CACHE_TIMEOUT = 60 * 60 * 24  # 24 hours
+    GENERATION_ID = 1
     
     @classmethod
-    def get_bonus_items(cls, category=None, search_term=None):
+    def cache_key(cls, category=None, search_term=None, generation=None):
+        """Key of a bonus items query in the given, by default the current, generation.
+        
+        Filters are hashed so keys stay short and free of spaces on every
+        cache backend.
+        """
+        if generation is None:
+            generation = cls.generation()
+        cache_key = f"{cls.CACHE_KEY}_{generation}"
+        if category or search_term:
+            filters = json.dumps([category or '', search_term or ''])
+            cache_key += f"_{hashlib.sha256(filters.encode('utf-8')).hexdigest()}"
+        return cache_key
+    
+    @classmethod
+    def get_bonus_items(cls, category=None, search_term=None, generation=None):
         """Get bonus items from cache or database"""
-        cache_key = cls.CACHE_KEY
-        if category:
-            cache_key += f"_{category}"
-        if search_term:
-            cache_key += f"_{search_term}"
+        cache_key = cls.cache_key(category, search_term, generation)
         
-        # Try to get from cache first
+        # Try to get from cache first; an empty result is cached too
         cached_items = cache.get(cache_key)
-        if cached_items:
+        if cached_items is not None:
             return cached_items
         
         # Get from database
@@ -41,25 +57,62 @@ class BonusCache:
     
     @classmethod
     def clear_cache(cls):
-        """Clear all bonus items cache"""
-        cache.delete_pattern(f"{cls.CACHE_KEY}*")
+        """Clear all bonus items cache.
+        
+        Works on any cache backend and across processes: keys of older
+        generations are never read again and expire after CACHE_TIMEOUT.
+        """
+        cls.bump_generation()
+    
+    @classmethod
+    def generation(cls):
+        """Current bonus snapshot generation, bumped whenever the bonus items change.
+        
+        Kept in the database rather than the cache, so that a bump by the
+        scraper reaches every process even with a per-process cache backend.
+        """
+        generation = BonusGeneration.objects.filter(pk=cls.GENERATION_ID).values_list('generation', flat=True)
+        return generation.first() or 0
+    
+    @classmethod
+    def bump_generation(cls):
+        """Start a new generation: cached bonus queries, matchers and recommendations all reload"""
+        updated = BonusGeneration.objects.filter(pk=cls.GENERATION_ID).update(
+            generation=F('generation') + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            try:
+                with transaction.atomic():
+                    BonusGeneration.objects.create(pk=cls.GENERATION_ID, generation=1)
+            except IntegrityError:
+                # Created concurrently, count this bump on top of it
+                BonusGeneration.objects.filter(pk=cls.GENERATION_ID).update(generation=F('generation') + 1)
+        return cls.generation()
+    
+    @classmethod
+    def matcher(cls):
+        """Bonus matcher over today's bonus items, loaded once per generation and day"""
+        today = timezone.now().date()
+        return get_bonus_matcher(
+            (cls.generation(), today),
+            lambda: list(AHBonusItem.objects.filter(valid_until__gte=today).values())
+        )
+    
+    @classmethod
+    def match_ingredients(cls, ingredient_names):
+        """Bonus items per ingredient name, best discount first"""
+        return cls.matcher().match_all(ingredient_names)
     
     @classmethod
     def find_matching_bonus_items(cls, ingredient_names):
         """Find bonus items that match ingredient names"""
         matching_items = []
-        
-        for ingredient in ingredient_names:
-            # Search for bonus items that contain the ingredient name
-            items = cls.get_bonus_items(search_term=ingredient)
-            matching_items.extend(items)
-        
-        # Remove duplicates
         seen_ids = set()
-        unique_items = []
-        for item in matching_items:
-            if item['id'] not in seen_ids:
-                unique_items.append(item)
-                seen_ids.add(item['id'])
         
-        return unique_items
\ No newline at end of file
+        for items in cls.match_ingredients(ingredient_names).values():
+            for item in items:
+                if item['id'] not in seen_ids:
+                    matching_items.append(item)
+                    seen_ids.add(item['id'])
+        
+        return matching_items
\ No newline at end of file
@@ -0,0 +1,137 @@
+import bisect
+import re
+import threading
+import unicodedata
+from collections import deque
+from recipes.ingredients import STOPWORDS, canonical_ingredient
+
+WORD_RE = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+# Words in bonus item names that say nothing about the product itself
+BONUS_STOPWORDS = STOPWORDS | frozenset("""
+    ah bio biologisch biologische excellent terra basic huismerk perfect
+    rode rood groene groen gele geel witte wit zwarte zwart bruine bruin
+    halfvolle volle magere mager jonge belegen oude gerookte gemarineerde gekookte
+    mini maxi extra light zero original classic naturel familie
+    diverse soorten varianten alle per ca pack multipack voordeel
+""".split())
+MIN_KEYWORD_LENGTH = 3
+
+def normalize(text):
+    """Lowercase letters-only form of a name: accents stripped, single spaces"""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return ' '.join(WORD_RE.findall(text))
+
+def bonus_keywords(name):
+    """Patterns that identify a bonus item: its significant words and their canonical ingredient"""
+    words = [
+        word for word in normalize(name).split()
+        if len(word) >= MIN_KEYWORD_LENGTH and word not in BONUS_STOPWORDS
+    ]
+    keywords = set(words)
+    canonical = canonical_ingredient(' '.join(words)) if words else ''
+    if canonical:
+        keywords.add(canonical.replace('_', ' '))
+    return keywords
+
+class AhoCorasick:
+    """Multi-pattern substring automaton: finds all patterns in a text in one pass"""
+
+    def __init__(self, patterns):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+        for pattern_id, pattern in enumerate(patterns):
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.output[state].append(pattern_id)
+
+        # Breadth-first failure links; a state also emits what its fallback emits
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+                self.output[next_state] = self.output[next_state] + self.output[self.fail[next_state]]
+
+    def find(self, text):
+        """Yield (end_index, pattern_id) for every pattern occurrence in text"""
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(char, 0)
+            for pattern_id in self.output[state]:
+                yield index, pattern_id
+
+class BonusMatcher:
+    """Matches ingredient lines to bonus items with one automaton over all bonus keywords.
+
+    A keyword matches when it starts or ends a word of the ingredient, so
+    "kip" finds "kipfilet" and "gehakt" finds "rundergehakt", but "ham" does
+    not find "champignons". Ingredients are also matched on their canonical
+    id, so "2 onions" finds "AH Uien".
+    """
+
+    def __init__(self, items):
+        self.items = sorted(items, key=lambda item: (-item['discount_percentage'], item['name']))
+        keyword_items = {}
+        for position, item in enumerate(self.items):
+            for keyword in bonus_keywords(item['name']):
+                keyword_items.setdefault(keyword, set()).add(position)
+        self.patterns = list(keyword_items)
+        self.pattern_items = [keyword_items[pattern] for pattern in self.patterns]
+        self.automaton = AhoCorasick(self.patterns)
+
+    @staticmethod
+    def _scan_text(ingredient):
+        canonical = canonical_ingredient(ingredient).replace('_', ' ')
+        return f' {normalize(ingredient)} {canonical} '
+
+    def match_all(self, ingredients):
+        """Bonus items per ingredient, best discount first, from a single pass over all lines"""
+        ingredients = list(ingredients)
+        texts = [self._scan_text(ingredient) for ingredient in ingredients]
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        joined = '\n'.join(texts)
+
+        matched = [set() for _ in ingredients]
+        for end, pattern_id in self.automaton.find(joined):
+            start = end - len(self.patterns[pattern_id]) + 1
+            if joined[start - 1] == ' ' or joined[end + 1] == ' ':
+                matched[bisect.bisect_right(starts, start) - 1] |= self.pattern_items[pattern_id]
+        return {
+            ingredient: [self.items[position] for position in sorted(positions)]
+            for ingredient, positions in zip(ingredients, matched)
+        }
+
+    def match(self, ingredient):
+        return self.match_all([ingredient])[ingredient]
+
+_matcher = None
+_matcher_key = None
+_matcher_lock = threading.Lock()
+
+def get_bonus_matcher(key, load_items):
+    """Return this process's matcher for a bonus snapshot, rebuilding it when `key` changes"""
+    global _matcher, _matcher_key
+    with _matcher_lock:
+        if _matcher is None or _matcher_key != key:
+            _matcher = BonusMatcher(load_items())
+            _matcher_key = key
+        return _matcher
@@ -0,0 +1,58 @@
+from recipes.ingredients import parse_ingredient, singular
+
+MIN_AFFIX_LENGTH = 3
+
+class FridgeMatcher:
+    """Answers "is this ingredient in the fridge" for one user's fridge.
+
+    Built once per request from the fridge item names. A recipe ingredient
+    is covered when its canonical id matches a fridge item's, or when one of
+    its words is, starts with or ends with the head word of a fridge item:
+    "Kip" covers "kipfilet" and "Gehakt" covers "500 g rundergehakt". Every
+    check is a handful of set lookups per word, independent of fridge size.
+    """
+
+    def __init__(self, names):
+        self.canonicals = set()
+        self.heads = set()
+        for name in names:
+            parsed = parse_ingredient(name)
+            if parsed.canonical:
+                self.canonicals.add(parsed.canonical)
+            if parsed.name:
+                # Dutch and English names put the head noun last: "rode paprika", "chicken breast"
+                self.heads.add(singular(parsed.name.split()[-1]))
+
+    @classmethod
+    def for_user(cls, user):
+        return cls(user.fridge_items.values_list('name', flat=True))
+
+    def _covers_word(self, word):
+        if word in self.heads or singular(word) in self.heads:
+            return True
+        for size in range(MIN_AFFIX_LENGTH, len(word)):
+            if word[:size] in self.heads or word[-size:] in self.heads:
+                return True
+        return False
+
+    def covers(self, ingredient):
+        """Whether an ingredient line, or its parsed dict, is in the fridge"""
+        parsed = ingredient if isinstance(ingredient, dict) else parse_ingredient(ingredient)._asdict()
+        if parsed['canonical'] in self.canonicals:
+            return True
+        return any(self._covers_word(word) for word in parsed['name'].split())
+
+    def missing_ingredients(self, recipe):
+        """Ingredient lines of a recipe that are not in the fridge"""
+        recipe.canonical_ingredients()  # parses the lines if needed
+        return [
+            line for line, parsed in zip(recipe.ingredient_lines(), recipe.parsed_ingredients)
+            if not self.covers(parsed)
+        ]
+
+    def coverage(self, recipe):
+        """Share of a recipe's ingredient lines the fridge covers, from 0 to 1"""
+        total = len(recipe.ingredient_lines())
+        if not total:
+            return 0.0
+        return 1 - len(self.missing_ingredients(recipe)) / total
@@ -18,16 +18,33 @@ class AHBonusItem(models.Model):
     
     class Meta:
         ordering = ['-discount_percentage', 'name']
+        indexes = [
+            models.Index(fields=['valid_until', '-discount_percentage'], name='bonus_valid_discount_idx'),
+            models.Index(fields=['-discount_percentage', 'name', 'valid_until'], name='bonus_discount_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} - {self.discount_percentage}% korting"
 
+class BonusGeneration(models.Model):
+    """Single row counting bonus snapshots, see shopping.bonus_cache.BonusCache.generation"""
+    generation = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Bonus generation {self.generation}"
+
 class ShoppingList(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='shopping_lists')
     name = models.CharField(max_length=100, default='Boodschappenlijst')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', '-created_at'], name='shoplist_user_recent_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} - {self.user.email}"
 
@@ -1,106 +1,120 @@
+import hashlib
+import json
+import re
+from functools import lru_cache
+from django.core.cache import cache
+from django.db import transaction
 from .models import ShoppingList, ShoppingListItem, RecipeShoppingList, AHBonusItem
 from .bonus_cache import BonusCache
+from .fridge_matcher import FridgeMatcher
 from accounts.models import FridgeItem
 from recipes.models import Recipe
 
+RECOMMENDATIONS_CACHE_KEY = 'shopping_recommendations_{generation}_{signature}'
+VEGAN_BLOCKED = ('vlees', 'kip', 'vis', 'kaas', 'melk')
+VEGETARIAN_BLOCKED = ('vlees', 'kip', 'vis')
+
+def profile_signature(profile):
+    """The parts of a profile that decide its shopping recommendations, in canonical form"""
+    dislikes = {dislike.strip().lower() for dislike in (profile.dislikes or '').split(',')}
+    return [
+        sorted(diet for diet in set(profile.diet_preferences or []) if diet in ('vegan', 'vegetarian')),
+        sorted({str(allergy).lower() for allergy in profile.allergies or []}),
+        sorted(dislike for dislike in dislikes if dislike),
+    ]
+
+@lru_cache(maxsize=1024)
+def _compile_filter(diets, allergies, dislikes):
+    words = set(allergies) | set(dislikes)
+    if 'vegan' in diets:
+        words.update(VEGAN_BLOCKED)
+    if 'vegetarian' in diets:
+        words.update(VEGETARIAN_BLOCKED)
+    if not words:
+        return None
+    return re.compile('|'.join(re.escape(word) for word in sorted(words, key=len, reverse=True)))
+
+def compile_profile_filter(signature):
+    """One regex matching bonus item names the profile excludes, or None to keep everything"""
+    return _compile_filter(*(tuple(part) for part in signature))
+
 class ShoppingListService:
     
     @staticmethod
     def create_recipe_shopping_list(user, recipe):
         """Create a shopping list based on a recipe and user's fridge contents"""
         
-        # Get user's fridge items
-        fridge_items = set(item.name.lower() for item in user.fridge_items.all())
+        # Find missing ingredients: "2 uien" is covered by an "Onion" in the fridge
+        fridge = FridgeMatcher.for_user(user)
+        missing_ingredients = fridge.missing_ingredients(recipe)
         
-        # Get recipe ingredients
-        recipe_ingredients = recipe.ingredients
-        if isinstance(recipe_ingredients, str):
-            # If ingredients is a string, split by lines
-            recipe_ingredients = recipe_ingredients.split('\n')
+        # Find matching bonus items for all missing ingredients in one pass
+        bonus_matches = BonusCache.match_ingredients(missing_ingredients)
+        best_bonus_ids = {
+            ingredient: matches[0]['id'] for ingredient, matches in bonus_matches.items() if matches
+        }
+        bonus_items = AHBonusItem.objects.in_bulk(set(best_bonus_ids.values()))
         
-        # Find missing ingredients
-        missing_ingredients = []
-        for ingredient in recipe_ingredients:
-            # Simple matching - in production, you'd want more sophisticated matching
-            ingredient_name = ingredient.lower().strip()
-            
-            # Check if any fridge item contains this ingredient
-            found_in_fridge = any(fridge_item in ingredient_name or ingredient_name in fridge_item 
-                                for fridge_item in fridge_items)
+        with transaction.atomic():
+            # Create shopping list
+            shopping_list = ShoppingList.objects.create(
+                user=user,
+                name=f"Boodschappen voor {recipe.title}"
+            )
             
-            if not found_in_fridge:
-                missing_ingredients.append(ingredient)
-        
-        # Create shopping list
-        shopping_list = ShoppingList.objects.create(
-            user=user,
-            name=f"Boodschappen voor {recipe.title}"
-        )
-        
-        # Find matching bonus items
-        bonus_items = BonusCache.find_matching_bonus_items(missing_ingredients)
-        bonus_dict = {item['name'].lower(): item for item in bonus_items}
-        
-        # Add missing ingredients to shopping list
-        for ingredient in missing_ingredients:
-            # Try to find matching bonus item
-            matching_bonus = None
-            for bonus_name, bonus_item in bonus_dict.items():
-                if bonus_name in ingredient.lower() or ingredient.lower() in bonus_name:
-                    matching_bonus = AHBonusItem.objects.get(id=bonus_item['id'])
-                    break
+            # Add missing ingredients to shopping list, with the best discounted bonus item if any
+            items = []
+            for ingredient in missing_ingredients:
+                matching_bonus = bonus_items.get(best_bonus_ids.get(ingredient))
+                items.append(ShoppingListItem(
+                    shopping_list=shopping_list,
+                    name=ingredient,
+                    ah_bonus_item=matching_bonus,
+                    estimated_price=matching_bonus.bonus_price if matching_bonus else None
+                ))
+            ShoppingListItem.objects.bulk_create(items)
             
-            ShoppingListItem.objects.create(
+            # Create recipe shopping list record
+            RecipeShoppingList.objects.create(
+                user=user,
+                recipe=recipe,
                 shopping_list=shopping_list,
-                name=ingredient,
-                ah_bonus_item=matching_bonus,
-                estimated_price=matching_bonus.bonus_price if matching_bonus else None
+                missing_ingredients=missing_ingredients
             )
         
-        # Create recipe shopping list record
-        RecipeShoppingList.objects.create(
-            user=user,
-            recipe=recipe,
-            shopping_list=shopping_list,
-            missing_ingredients=missing_ingredients
-        )
-        
         return shopping_list
     
     @staticmethod
     def get_shopping_recommendations(user):
-        """Get shopping recommendations based on user's preferences and current bonuses"""
-        
-        profile = user.profile
+        """Get shopping recommendations based on user's preferences and current bonuses.
         
-        # Get current bonus items
-        bonus_items = BonusCache.get_bonus_items()
+        Users with the same diets, allergies and dislikes get the same list, so
+        the top 20 is cached per profile signature and bonus generation. The
+        generation is read from the database, so a new bonus snapshot reaches
+        every process.
+        """
         
-        # Filter based on user preferences
-        recommended_items = []
+        signature = profile_signature(user.profile)
+        # One read of the generation: the key and the items it caches must agree
+        generation = BonusCache.generation()
+        cache_key = RECOMMENDATIONS_CACHE_KEY.format(
+            generation=generation,
+            signature=hashlib.sha256(json.dumps(signature).encode('utf-8')).hexdigest()
+        )
+        recommended_items = cache.get(cache_key)
+        if recommended_items is not None:
+            return recommended_items
         
-        for item in bonus_items:
-            # Simple filtering based on diet preferences
-            item_name_lower = item['name'].lower()
-            
-            # Skip items that conflict with diet preferences
-            if 'vegan' in profile.diet_preferences and any(meat in item_name_lower for meat in ['vlees', 'kip', 'vis', 'kaas', 'melk']):
-                continue
-            
-            if 'vegetarian' in profile.diet_preferences and any(meat in item_name_lower for meat in ['vlees', 'kip', 'vis']):
-                continue
-            
-            # Skip items with allergies
-            if any(allergy in item_name_lower for allergy in profile.allergies):
-                continue
-            
-            # Skip disliked items
-            if profile.dislikes and any(dislike.strip().lower() in item_name_lower for dislike in profile.dislikes.split(',')):
-                continue
-            
-            recommended_items.append(item)
+        # Filter current bonus items on all of the profile's words at once
+        blocked = compile_profile_filter(signature)
+        recommended_items = [
+            item for item in BonusCache.get_bonus_items(generation=generation)
+            if blocked is None or not blocked.search(item['name'].lower())
+        ]
         
         # Sort by discount percentage
         recommended_items.sort(key=lambda x: x['discount_percentage'], reverse=True)
+        recommended_items = recommended_items[:20]  # Return top 20 recommendations
         
-        return recommended_items[:20]  # Return top 20 recommendations
\ No newline at end of file
+        cache.set(cache_key, recommended_items, BonusCache.CACHE_TIMEOUT)
+        return recommended_items
@@ -0,0 +1,61 @@
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase
+from django.utils import timezone
+from accounts.models import User, UserProfile
+from .bonus_cache import BonusCache
+from .models import AHBonusItem, BonusGeneration
+from .services import ShoppingListService
+
+def bonus_item(name, product_id, discount=25):
+    today = timezone.now().date()
+    return AHBonusItem.objects.create(
+        name=name, original_price=2, bonus_price=1.5, discount_percentage=discount,
+        valid_from=today, valid_until=today + timedelta(days=7), ah_product_id=product_id
+    )
+
+class BonusGenerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        bonus_item('AH Kipfilet', 'kip')
+
+    def test_bump_in_another_process_invalidates(self):
+        self.assertEqual([item['name'] for item in BonusCache.get_bonus_items()], ['AH Kipfilet'])
+        self.assertEqual(list(BonusCache.match_ingredients(['300 g tomaten']).values()), [[]])
+
+        # The scraper runs elsewhere: it writes the items and bumps the row, never this process's cache
+        bonus_item('AH Trostomaten', 'tomaat')
+        BonusGeneration.objects.update_or_create(pk=BonusCache.GENERATION_ID, defaults={'generation': 41})
+
+        self.assertEqual(len(BonusCache.get_bonus_items()), 2)
+        matches = BonusCache.match_ingredients(['300 g tomaten'])
+        self.assertEqual([item['name'] for item in matches['300 g tomaten']], ['AH Trostomaten'])
+
+    def test_bump_generation(self):
+        self.assertEqual(BonusCache.generation(), 0)
+        self.assertEqual(BonusCache.bump_generation(), 1)
+        BonusCache.clear_cache()
+        self.assertEqual(BonusCache.generation(), 2)
+
+class ShoppingRecommendationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='a', email='a@example.com', password='x')
+        UserProfile.objects.create(user=self.user, diet_preferences=['vegetarian'])
+        bonus_item('AH Kipfilet', 'kip', 40)
+        bonus_item('AH Trostomaten', 'tomaat', 20)
+
+    def names(self):
+        return [item['name'] for item in ShoppingListService.get_shopping_recommendations(self.user)]
+
+    def test_profile_filter_and_order(self):
+        bonus_item('AH Paprika', 'paprika', 30)
+        self.assertEqual(self.names(), ['AH Paprika', 'AH Trostomaten'])
+
+    def test_new_generation_from_another_process(self):
+        self.assertEqual(self.names(), ['AH Trostomaten'])
+        bonus_item('AH Courgette', 'courgette', 35)
+        self.assertEqual(self.names(), ['AH Trostomaten'])  # cached until the scraper bumps
+
+        BonusGeneration.objects.update_or_create(pk=BonusCache.GENERATION_ID, defaults={'generation': 7})
+        self.assertEqual(self.names(), ['AH Courgette', 'AH Trostomaten'])